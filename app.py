@@ -1,25 +1,34 @@
 import streamlit as st
-import os, json, zipfile
+import os, json, zipfile, time, logging, subprocess, sys, threading, uuid
 from io import BytesIO
 import json
 import base64
 import streamlit.components.v1 as components
-from fpdf import FPDF
 from dotenv import load_dotenv
-from streamlit_cropper import st_cropper
-from PIL import Image
-import google.generativeai as genai
 from genai.classify_text import classify_document_type
-from genai.summarize_text import summarize_and_extract
-from genai.restore_text import restore_text_with_gemini
+from genai.summarize_text import API_ERROR, summarize_and_extract, summarize_and_extract_stream
+from genai.restore_text import restore_text_with_gemini, restore_text_with_gemini_stream
 from genai.title_keyword import extract_title_and_keywords
-from ocr.ocr_utils import perform_ocr, simulate_damaged_text
-from genai.restore_text import restore_text_with_rag
+from ocr.ocr_cache import get_ocr_cache
+from ocr.ingest import IMAGE_EXTENSIONS, SUPPORTED_EXTENSIONS, count_pages, iter_page_refs
+from ocr.uploads import CROP_PREVIEW_SIZE, image_size, preview_box_to_full, save_upload, thumbnail_path
+from genai.restore_text import restore_text_with_rag_stream, restore_text_chunked
+from genai.client import generate_stream, get_model
+from genai.analyze_text import analyze_document, format_summary, format_classification
+from genai.llm_cache import get_llm_cache
+from genai.prompting import fit_document
+from store.result_store import STAGE_VERSIONS, StageView, get_result_store
+from store.job_queue import ACTIVE, DONE, FAILED, get_job_queue
+from worker import DEFAULT_WORKERS, ocr_params, ocr_thread_share, restore_params
 
 
 # Load environment variables
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Surfaces the per-call Gemini token/latency lines from genai.client in the server log
+logging.basicConfig(level=os.getenv("ECOSCRIBE_LOG_LEVEL", "INFO"),
+                    format="%(asctime)s %(name)s %(levelname)s %(message)s")
+# Heavy dependencies (cv2, the cropper, FPDF, FAISS/LangChain, the Gemini SDK) are imported
+# inside the sections that use them, so a rerun of the upload page never loads them
 os.makedirs("uploads", exist_ok=True)
 
 def clickable_text(text, key_prefix):
@@ -33,11 +42,101 @@ def clickable_text(text, key_prefix):
                 style="border:none;background:transparent;color:#0a84ff;cursor:pointer;padding:1px;">{word}</button> '''
     return html
 
+def stream_to_placeholder(chunks, placeholder, started):
+    """Render streamed text incrementally; returns the final text and time-to-first-token in seconds."""
+    text, ttft = "", None
+    for chunk in chunks:
+        if ttft is None:
+            ttft = time.perf_counter() - started
+        text += chunk
+        placeholder.markdown(text + "▌")
+    placeholder.markdown(text)
+    return text.strip(), ttft or 0.0
+
 # Page Config
 st.set_page_config(page_title="EcoScribe - OCR", layout="wide", initial_sidebar_state="expanded")
-for key in ["restored_text", "extracted_results", "ocr_accuracy", "summary_texts", "titles", "keywords_map", "classifications", "cropped_files"]: # Add 'cropped_files' here as it's a list that needs initialization
+def session_docs():
+    """The documents this session uploaded; the shared result store is only ever seen through them."""
+    return st.session_state.get("uploaded_files", [])
+
+# Stage results live in the durable result store (shared across sessions, survives refreshes/restarts);
+# each session only holds thin dict-like views, limited to its own uploads, that load values on access
+for key in ["restored_text", "extracted_results", "ocr_accuracy", "ocr_words", "summary_texts", "titles", "keywords_map", "classifications"]:
     if key not in st.session_state:
-        st.session_state[key] = {} if key not in ["cropped_files"] else [] # Initialize cropped_files as a list
+        st.session_state[key] = StageView(get_result_store(), key, scope=session_docs)
+if "crop_boxes" not in st.session_state:
+    st.session_state.crop_boxes = {}  # upload path -> (x1, y1, x2, y2) in full-resolution pixels
+if "display_names" not in st.session_state:
+    st.session_state.display_names = {}  # stored upload path -> the file name the user uploaded
+if "stored_uploads" not in st.session_state:
+    st.session_state.stored_uploads = {}  # uploader file id -> stored path, so reruns don't rehash
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # owner of this session's background jobs
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []  # jobs this session enqueued, including ones deduplicated onto another session's
+
+
+@st.cache_resource
+def _worker_launcher():
+    return {"lock": threading.Lock(), "process": None}
+
+
+def ensure_workers():
+    """Start a background worker pool (worker.py) unless one is already heartbeating."""
+    launcher = _worker_launcher()
+    with launcher["lock"]:
+        running = launcher["process"] is not None and launcher["process"].poll() is None
+        if running or get_job_queue().live_workers():
+            return
+        launcher["process"] = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py"),
+                                               "--workers", str(DEFAULT_WORKERS)])
+
+
+def enqueue_job(kind, payload, label):
+    """Hand long-running work to the background workers; progress shows in the sidebar job panel."""
+    ensure_workers()
+    job_id = get_job_queue().enqueue(kind, payload, owner=st.session_state.session_id)
+    if job_id not in st.session_state.job_ids:
+        st.session_state.job_ids.append(job_id)
+    st.info(f"⏳ {label} queued as job #{job_id}; results appear here as soon as it finishes.")
+
+
+@st.fragment(run_every=2)
+def render_jobs_panel():
+    """Poll this session's background jobs; reruns the page once a job has finished so its results show."""
+    queue = get_job_queue()
+    jobs = queue.jobs(ids=st.session_state.job_ids, limit=8)
+    finished = {job["id"] for job in jobs if job["status"] == DONE}
+    if "seen_done_jobs" not in st.session_state:
+        st.session_state.seen_done_jobs = finished
+    if not jobs:
+        return
+    st.markdown("### ⏳ Background Jobs")
+    for job in jobs:
+        if job["status"] in ACTIVE:
+            st.progress(job["progress"], text=f"#{job['id']} {job['kind']}: {job['message'] or job['status']}")
+            if st.button("✖️ Cancel", key=f"cancel_job_{job['id']}"):
+                queue.cancel(job["id"])
+        else:
+            icon = {DONE: "✅", FAILED: "❌"}.get(job["status"], "🚫")
+            failures = len((json.loads(job["result"]) or {}).get("failures", {})) if job["result"] else 0
+            note = f" ({failures} failed)" if failures else ""
+            st.caption(f"{icon} #{job['id']} {job['kind']} {job['status']}{note}")
+            if job["status"] == FAILED:
+                with st.expander(f"Error in job #{job['id']}"):
+                    st.code(job["error"])
+    if finished - st.session_state.seen_done_jobs:
+        st.session_state.seen_done_jobs = finished
+        st.rerun()
+
+
+def display_name(path):
+    """Uploads are stored under their content hash; show the name they were uploaded as."""
+    return st.session_state.display_names.get(path, os.path.basename(path))
+
+def stale_paths(stage, paths, params=None):
+    """The paths whose stored stage result is missing or out of date with its input (or params); the rest are skipped."""
+    return [p for p in paths if not st.session_state[stage].is_fresh(p, params)]
 
 def render_progress_timeline():
     if "uploaded_files" not in st.session_state or not st.session_state.uploaded_files:
@@ -45,48 +144,38 @@ def render_progress_timeline():
 
     st.markdown("### 🧾 Session Progress")
 
+    steps = [
+        ("📤 Uploaded", "uploaded_files"),
+        ("✂️ Cropped", "crop_boxes"),
+        ("🧠 OCR Done", "extracted_results"),
+        ("🔁 Restored", "restored_text"),
+        ("📌 Summary", "summary_texts"),
+        ("📑 Title/Keywords", "titles"),
+        ("📂 Classified", "classifications"),
+        ("📦 Exported", None),  # Optional future step
+    ]
+    # Every file's stored stages and their freshness in one query, rather than a few lookups per cell
+    statuses = get_result_store().statuses(st.session_state.uploaded_files,
+                                           [key for _, key in steps if key in STAGE_VERSIONS])
+
     # Iterate through the original uploaded files to track their individual progress
     for full_path in st.session_state.uploaded_files:
-        # Use the full_path itself as the identifier for all checks
-        file_identifier = full_path
-        display_name = os.path.basename(full_path) # For display purposes only
-
-        st.markdown(f"**📄 {display_name}**")
-
-        steps = [
-            ("📤 Uploaded", "uploaded_files"),
-            ("✂️ Cropped", "cropped_files"),
-            ("🧠 OCR Done", "extracted_results"),
-            ("🔁 Restored", "restored_text"),
-            ("📌 Summary", "summary_texts"),
-            ("📑 Title/Keywords", "titles"),
-            ("📂 Classified", "classifications"),
-            ("📦 Exported", None),  # Optional future step
-        ]
+        st.markdown(f"**📄 {display_name(full_path)}**")
 
         for label, key in steps:
-            completed = False
-            if key:
-                data = st.session_state.get(key)
-                if data:
-                    if isinstance(data, dict):
-                        # Check if the file_identifier (full path) is a key in the dictionary
-                        completed = file_identifier in data
-                    elif isinstance(data, list):
-                        # For lists (like cropped_files), check if the cropped version exists for this original file
-                        # We need to be careful here: if you're replacing the original with a cropped one in the list,
-                        # the check should be based on the path of the cropped file.
-                        # For simplicity and consistency with other steps, let's assume 'cropped_files'
-                        # will also store full paths like 'uploads/cropped_original.png'
-                        # A better approach for 'cropped' would be to store a mapping of original_path: cropped_path
-                        # For now, let's ensure that if a cropped file exists for the *original* file, it's marked.
-                        if key == "cropped_files":
-                            # This check now looks for a cropped file that *originated* from the current file_identifier
-                            completed = any(os.path.basename(file_identifier) in os.path.basename(f) for f in data)
-                        else:
-                            completed = file_identifier in data # This might not be used for lists if they're not paths
+            fresh = True
+            if key in STAGE_VERSIONS:
+                fresh = statuses.get((full_path, key))
+                completed = fresh is not None
+            elif key:
+                # The session's own upload list and crop_boxes dict
+                completed = full_path in st.session_state.get(key, ())
+            else:
+                completed = False
 
             check = "✅" if completed else "⬜"
+            if completed and not fresh:
+                check = "🔄"  # done, but its input changed since; rerun to refresh
             st.markdown(f"{check} {label}")
 
         st.markdown("---")
@@ -111,6 +200,10 @@ with st.sidebar:
     section = st.radio("🔹 Navigate", steps, index=0)
     st.markdown("---")
     render_progress_timeline()
+    render_jobs_panel()
+    llm_stats = get_llm_cache().stats()
+    st.caption(f"🗄️ LLM cache: {llm_stats['hit_rate']:.0%} hit rate, {llm_stats['tokens_saved']:,} tokens saved "
+               f"({llm_stats['total_tokens_saved']:,} all-time)")
     st.caption("Crafted with ❤️ using Streamlit")
 
 # --- Theme Styles ---
@@ -203,20 +296,29 @@ elif section == "📤 Upload Documents":
 
     uploaded_files = st.file_uploader(
         "Upload one or more scanned documents",
-        type=["png", "jpg", "jpeg"],
+        type=[ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS],
         accept_multiple_files=True
     )
 
     if uploaded_files:
         uploaded_paths = []
         for file in uploaded_files:
-            path = os.path.join("uploads", file.name)
-            with open(path, "wb") as f:
-                f.write(file.getbuffer())
+            # Content-addressed and written once; on reruns the stored path is reused without rehashing
+            upload_key = getattr(file, "file_id", None) or (file.name, file.size)
+            if upload_key not in st.session_state.stored_uploads:
+                st.session_state.stored_uploads[upload_key] = save_upload(file, file.name)
+            path = st.session_state.stored_uploads[upload_key]
+            st.session_state.display_names[path] = file.name
             uploaded_paths.append(path)
+        uploaded_paths = list(dict.fromkeys(uploaded_paths))  # the same content uploaded twice is one document
         st.session_state.uploaded_files = uploaded_paths
         st.success(f"✅ {len(uploaded_paths)} file(s) uploaded.")
-        st.image(uploaded_paths, caption="Uploaded Images", use_column_width=True)
+        # Downscaled previews only; the full-resolution originals stay on disk for OCR
+        st.image([thumbnail_path(p) for p in uploaded_paths], caption=[display_name(p) for p in uploaded_paths],
+                 width=240)
+        for path in uploaded_paths:
+            if not path.lower().endswith(IMAGE_EXTENSIONS) or count_pages(path) > 1:
+                st.caption(f"📚 {display_name(path)}: {count_pages(path)} page(s)")
 
 # --- ✂️ Crop Uploaded Images ---
 elif section == "✂️ Crop Images":
@@ -229,41 +331,40 @@ elif section == "✂️ Crop Images":
         current_uploaded_files = list(st.session_state.uploaded_files)
 
         for img_path in current_uploaded_files:
-            st.subheader(f"🖼️ {os.path.basename(img_path)}")
-
-            # Load image
-            image = Image.open(img_path)
-            cropped_img = st_cropper(
-                image,
+            st.subheader(f"🖼️ {display_name(img_path)}")
+            if not img_path.lower().endswith(IMAGE_EXTENSIONS) or count_pages(img_path) > 1:
+                st.info("📚 Multi-page documents are OCR'd page by page without cropping.")
+                continue
+
+            from PIL import Image
+            from streamlit_cropper import st_cropper
+
+            # The cropper gets a cached ~1000px preview; the box is mapped back to full resolution
+            with Image.open(thumbnail_path(img_path, size=CROP_PREVIEW_SIZE)) as preview:
+                preview.load()
+            box = st_cropper(
+                preview,
                 realtime_update=True,
                 box_color="#00FFAA",
-                aspect_ratio=None
+                aspect_ratio=None,
+                return_type="box",
+                key=f"cropper_{img_path}",
             )
+            crop_box = preview_box_to_full(box, preview.size, image_size(img_path))
+            st.image(preview.crop((box["left"], box["top"], box["left"] + box["width"], box["top"] + box["height"])),
+                     caption="Crop preview", width=300)
 
-            # Save cropped image to replace original if user wants
-            # Create a unique name for the cropped file to avoid conflicts and track it
-            cropped_file_name = f"cropped_{os.path.basename(img_path)}"
-            save_path = os.path.join("uploads", cropped_file_name)
-
-            if st.button(f"💾 Save Cropped Version of {os.path.basename(img_path)}", key=f"save_crop_{img_path}"):
-                cropped_img.save(save_path)
+            if st.button(f"💾 Use this Crop for {display_name(img_path)}", key=f"save_crop_{img_path}"):
+                # Only the box is kept; OCR crops the original itself, so no cropped copy is written
+                st.session_state.crop_boxes[img_path] = crop_box
+                st.success("✅ Crop saved and will be used for OCR.")
 
-                # Update session state for cropped files.
-                # It's crucial to associate the original file with its cropped version.
-                # A dictionary mapping original path to cropped path would be ideal here.
-                # For simplicity with your current structure, let's add the cropped path to a list
-                # and ensure it's checked in render_progress_timeline.
-                # We also need to decide if cropping *replaces* the original for future steps
-                # or if the cropped version is just an *alternative*.
-                # Given your OCR section's 'ocr_source', it seems it should be an alternative.
-                if save_path not in st.session_state.cropped_files:
-                    st.session_state.cropped_files.append(save_path)
-
-                st.success("✅ Cropped image saved and will be used for OCR.")
-
-            # Display cropped image preview if available
-            if os.path.exists(save_path):
-                st.image(save_path, caption=f"Preview: {cropped_file_name}", use_column_width=True)
+            if img_path in st.session_state.crop_boxes:
+                x1, y1, x2, y2 = st.session_state.crop_boxes[img_path]
+                st.caption(f"Crop used for OCR: ({x1}, {y1}) – ({x2}, {y2}) of {'×'.join(map(str, image_size(img_path)))} px")
+                if st.button(f"↩️ Use the Full Page of {display_name(img_path)}", key=f"clear_crop_{img_path}"):
+                    del st.session_state.crop_boxes[img_path]
+                    st.rerun()
 
 
 # --- 🧠 Batch OCR ---
@@ -294,42 +395,70 @@ elif section == "🧠 Batch OCR":
         # User Selections
         psm = st.selectbox("Select PSM Mode", list(psm_options.keys()), format_func=lambda x: f"{x} - {psm_options[x]}")
         lang = st.selectbox("OCR Language", list(langs.keys()))
+        # Each background worker gets its share of the cores, so one job can't take the whole box
+        ocr_share = ocr_thread_share(DEFAULT_WORKERS)
+        ocr_workers = st.slider("Parallel OCR Workers", 1, ocr_share, ocr_share) if ocr_share > 1 else 1
+        ocr_timeout = st.number_input("Per-page Timeout (seconds, 0 = none)", min_value=0, value=120, step=10)
+        with st.expander("⚙️ Preprocessing"):
+            denoise_method = st.selectbox("Denoising", ["auto", "median", "bilateral", "nlmeans", "none"],
+                                          help="'auto' estimates scan noise and only denoises when needed")
+            threshold_method = st.selectbox("Thresholding", ["otsu", "adaptive"])
+            target_dpi = st.number_input("Downscale scans above (DPI)", min_value=150, max_value=600, value=300, step=50)
+            ocr_engine = st.selectbox("OCR Engine", ["auto", "tesserocr", "pytesseract"],
+                                      help="tesserocr keeps Tesseract loaded in-process; pytesseract spawns it per page")
+            ocr_layout = st.checkbox("🗞️ Layout-aware OCR (split columns/blocks and OCR them in parallel)",
+                                     help="Best for newspaper-style multi-column pages; PSM is chosen per block")
 
         # Helper for confidence visualization
         def highlight_ocr_text(text, word_confidences):
+            # word_confidences is aligned with text.split(): one Tesseract confidence per word
             words = text.split()
             highlighted = []
-            for word in words:
-                confidence = word_confidences.get(word.strip(), 100)  # default 100%
+            for i, word in enumerate(words):
+                confidence = word_confidences[i] if i < len(word_confidences) else 100  # default 100%
                 color = "green" if confidence >= 85 else "orange" if confidence >= 70 else "red"
                 highlighted.append(f'<span style="color:{color}">{word}</span>')
             return " ".join(highlighted)
 
         # Run OCR Button
         if st.button("🔍 Run OCR for All Files"):
-            st.session_state.extracted_results = {}
-            st.session_state.ocr_accuracy = {}
-
-            # Determine OCR source: cropped file > original
+            # Results for re-OCR'd files are overwritten by the job; downstream stages then show as stale
+            options = {"psm": psm, "lang": langs[lang], "max_workers": ocr_workers, "timeout": ocr_timeout,
+                       "target_dpi": target_dpi, "denoise": denoise_method, "threshold": threshold_method,
+                       "engine": ocr_engine, "layout": ocr_layout}
+            # Files already OCR'd with these settings and crop are skipped
+            paths = [p for p in st.session_state.uploaded_files
+                     if not st.session_state.extracted_results.is_fresh(p, ocr_params(options, st.session_state.crop_boxes.get(p)))]
+
+            # OCR reads the originals; multi-page files expand to one source per page, and
+            # saved crops travel as boxes applied when the page is decoded
             ocr_source_map = {}
-            for original_path in st.session_state.uploaded_files:
-                cropped = next((cp for cp in st.session_state.cropped_files if os.path.basename(original_path) in os.path.basename(cp)), None)
-                ocr_source_map[original_path] = cropped if cropped else original_path
-
-            with st.spinner("Running OCR on all files..."):
-                for original_path, path_to_ocr in ocr_source_map.items():
-                    text, accuracy = perform_ocr(path_to_ocr, psm=psm, lang=langs[lang])
-                    st.session_state.extracted_results[original_path] = text
-                    st.session_state.ocr_accuracy[original_path] = accuracy
-
-            st.success("✅ OCR complete for all documents!")
+            page_owner = {}
+            crop_boxes = {}
+            for original_path in paths:
+                if original_path in st.session_state.crop_boxes:
+                    crop_boxes[original_path] = st.session_state.crop_boxes[original_path]
+                for ref in iter_page_refs(original_path):
+                    ocr_source_map[ref] = ref
+                    page_owner[ref] = original_path
+
+            if paths:
+                enqueue_job("ocr", {"sources": ocr_source_map, "owners": page_owner, "crop_boxes": crop_boxes,
+                                    "options": options},
+                            f"OCR of {len(paths)} file(s)")
+            else:
+                st.success("✅ All OCR results are up to date with these settings.")
+
+        cache_stats = get_ocr_cache().stats()
+        st.caption(f"🗄️ OCR cache: {cache_stats['total_hits']} hits / {cache_stats['total_misses']} misses, "
+                   f"{cache_stats['entries']} entries ({cache_stats['bytes'] / 1e6:.1f} MB)")
 
         # Show Results
         for original_path, text in st.session_state.extracted_results.items():
-            st.subheader(f"📄 {os.path.basename(original_path)}")
+            st.subheader(f"📄 {display_name(original_path)}")
 
-            # Confidence simulation (replace with real data if available)
-            word_confidences = {w: 80 + (i % 20) for i, w in enumerate(text.split())}
+            # Per-word Tesseract confidences from the OCR pass
+            word_confidences = [w["conf"] for w in st.session_state.ocr_words.get(original_path, [])]
             highlighted_html = highlight_ocr_text(text, word_confidences)
             st.markdown("### 🔎 OCR Confidence Highlight", unsafe_allow_html=True)
             st.markdown(highlighted_html, unsafe_allow_html=True)
@@ -338,8 +467,11 @@ elif section == "🧠 Batch OCR":
             edited_text = st.text_area("✏️ Edit OCR Text", text, height=250, key=f"edit_ocr_{original_path}")
             if st.button("🔁 Reprocess with GenAI", key=f"reprocess_btn_{original_path}"):
                 new_summary = summarize_and_extract(edited_text)
-                st.session_state.summary_texts[original_path] = new_summary
-                st.success("✅ Reprocessed and updated summary.")
+                if new_summary.startswith(API_ERROR):
+                    st.error(new_summary)
+                else:
+                    st.session_state.summary_texts[original_path] = new_summary
+                    st.success("✅ Reprocessed and updated summary.")
 
             # Accuracy info
             st.info(f"🔍 Estimated OCR Accuracy: **{st.session_state.ocr_accuracy.get(original_path, 0)}%**")
@@ -354,7 +486,7 @@ elif section == "🧠 Batch OCR":
                     st.download_button(
                         "📄 Download Heatmap",
                         f,
-                        file_name=os.path.basename(export_path),
+                        file_name=f"ocr_heatmap_{display_name(original_path)}.html",
                         mime="text/html",
                         key=f"download_heatmap_{original_path}"
                     )
@@ -368,7 +500,7 @@ elif section == "📝 View Extracted Text":
         st.info("⚠️ No OCR output found.")
     else:
         for file_path, text in st.session_state.extracted_results.items():
-            st.subheader(f"📄 {os.path.basename(file_path)}")
+            st.subheader(f"📄 {display_name(file_path)}")
 
             # Show OCR confidence score
             accuracy = st.session_state.ocr_accuracy.get(file_path, 0)
@@ -386,21 +518,26 @@ elif section == "🔁 Damage & Restore":
     if "extracted_results" not in st.session_state or not st.session_state.extracted_results:
         st.warning("⚠️ Please complete OCR first.")
     else:
-        for file_path, text in st.session_state.extracted_results.items():
-            st.subheader(f"📄 {os.path.basename(file_path)}")
-            damaged = simulate_damaged_text(text)
-            style = st.radio(f"Restoration Style for {os.path.basename(file_path)}", ["simple", "legal", "academic"], key=f"style_{file_path}")
+        batch_rag = st.checkbox("🔍 Use RAG for batch restoration", key="batch_use_rag")
+        if st.button("🛠️ Restore All Documents", key="restore_all_btn"):
+            paths = stale_paths("restored_text", list(st.session_state.extracted_results), restore_params(use_rag=batch_rag))
+            if paths:
+                enqueue_job("restore", {"paths": paths, "use_rag": batch_rag}, f"Restoration of {len(paths)} document(s)")
+            else:
+                st.success("✅ All restorations are up to date.")
 
-            # Ensure restored_text is initialized for each file if not already
-            if file_path not in st.session_state.restored_text:
-                st.session_state.restored_text[file_path] = ""
+        from ocr.ocr_utils import simulate_damaged_text
 
-            if st.button(f"🛠️ Restore {os.path.basename(file_path)}", key=f"restore_btn_toggle_{file_path}"):
-                with st.spinner("Restoring..."):
-                    restored = restore_text_with_rag(damaged, style=style)
+        for file_path, text in st.session_state.extracted_results.items():
+            st.subheader(f"📄 {display_name(file_path)}")
+            damaged = simulate_damaged_text(text)
+            style = st.radio(f"Restoration Style for {display_name(file_path)}", ["simple", "legal", "academic"], key=f"style_{file_path}")
 
-                    st.session_state.restored_text[file_path] = restored # Store using full path
-                st.success("✅ Restoration Done!")
+            if st.button(f"🛠️ Restore {display_name(file_path)}", key=f"restore_btn_toggle_{file_path}"):
+                started = time.perf_counter()
+                restored, ttft = stream_to_placeholder(restore_text_with_rag_stream(damaged, style=style), st.empty(), started)
+                st.session_state.restored_text.put(file_path, restored, restore_params(style, use_rag=True)) # Store using full path
+                st.success(f"✅ Restoration Done! (first token after {ttft:.1f}s)")
 
             # Show Before/After Comparison Side by Side
             col1, col2 = st.columns(2)
@@ -418,7 +555,7 @@ elif section == "🔁 Damage & Restore":
                 clicked_word = st.text_input("🔍 Ask Why this Word was Used", key=f"{file_path}_input")
 
                 if st.button("🤔 Explain Word Choice", key=f"explain_btn_{file_path}"):
-                    full_context = restored_output
+                    full_context = fit_document(restored_output, "explain", focus=clicked_word)
                     explanation_prompt = f"""
                 You're an explainable AI model for document restoration.
 
@@ -442,21 +579,31 @@ elif section == "🔁 Damage & Restore":
 
             user_feedback = st.text_area("💬 Provide Feedback to Improve Restoration", "", key=f"feedback_input_{file_path}")
             use_rag = st.checkbox("🔍 Use RAG-based Contextual Restoration", key=f"use_rag_{file_path}")
-
-            if st.button(f"🛠️ Restore {os.path.basename(file_path)}", key=f"restore_btn_{os.path.basename(file_path).replace('.', '_').replace(' ', '_')}"):
-                with st.spinner("Restoring..."):
+            use_chunks = st.checkbox("✂️ Chunked restoration (long documents: restore sections in parallel)",
+                                     value=len(damaged) > 6000, key=f"use_chunks_{file_path}")
+
+            if st.button(f"🛠️ Restore {display_name(file_path)}", key=f"restore_btn_{os.path.basename(file_path).replace('.', '_').replace(' ', '_')}"):
+                started = time.perf_counter()
+                if use_chunks:
+                    with st.spinner("Restoring chunks concurrently..."):
+                        restored, chunk_report = restore_text_chunked(damaged, style=style, use_rag=use_rag)
+                    st.session_state.restored_text.put(file_path, restored, restore_params(style, use_rag))
+                    st.success(f"✅ Restoration Done! ({len(chunk_report)} chunks in {time.perf_counter() - started:.1f}s)")
+                    st.dataframe(chunk_report, use_container_width=True)
+                else:
                     if use_rag:
-                        restored = restore_text_with_rag(damaged, style=style)
+                        chunks = restore_text_with_rag_stream(damaged, style=style)
                     else:
-                        restored = restore_text_with_gemini(damaged, style=style)
-                    st.session_state.restored_text[file_path] = restored
-                st.success("✅ Restoration Done!")
+                        chunks = restore_text_with_gemini_stream(damaged, style=style)
+                    restored, ttft = stream_to_placeholder(chunks, st.empty(), started)
+                    st.session_state.restored_text.put(file_path, restored, restore_params(style, use_rag))
+                    st.success(f"✅ Restoration Done! (first token after {ttft:.1f}s)")
 
             if st.button("📨 Submit Feedback", key=f"submit_feedback_{file_path}"):
                 # Simulate prompt enhancement (optionally log for fine-tuning later)
-                enhanced_prompt = f"Feedback: {user_feedback}\nText: {restored_output}"
+                enhanced_prompt = f"Feedback: {user_feedback}\nText: {fit_document(restored_output, 'feedback')}"
                 refined_output = restore_text_with_gemini(enhanced_prompt)
-                st.session_state.restored_text[file_path] = refined_output
+                st.session_state.restored_text.put(file_path, refined_output, restore_params(style, use_rag))
                 st.success("✅ Restoration refined with feedback.")
 
 
@@ -467,14 +614,47 @@ elif section == "📌 Summary & Metadata":
     if "restored_text" not in st.session_state or not st.session_state.restored_text:
         st.warning("⚠️ Please restore text first.")
     else:
+        col_all_summary, col_all_analysis = st.columns(2)
+        if col_all_summary.button("📄 Summarize All Documents", key="summarize_all_btn"):
+            paths = stale_paths("summary_texts", list(st.session_state.restored_text))
+            if paths:
+                enqueue_job("summarize", {"paths": paths}, f"Summaries of {len(paths)} document(s)")
+            else:
+                st.success("✅ All summaries are up to date.")
+        if col_all_analysis.button("⚡ Full Analysis of All Documents", key="analyze_all_btn"):
+            paths = [p for p in st.session_state.restored_text
+                     if not all(st.session_state[stage].is_fresh(p)
+                                for stage in ("summary_texts", "titles", "keywords_map", "classifications"))]
+            if paths:
+                enqueue_job("analyze", {"paths": paths}, f"Full analysis of {len(paths)} document(s)")
+            else:
+                st.success("✅ All analyses are up to date.")
+
         for file_path, restored_text in st.session_state.restored_text.items():
-            st.subheader(f"📄 {os.path.basename(file_path)}")
+            st.subheader(f"📄 {display_name(file_path)}")
             st.text_area("Restored Text", restored_text, height=250)
-            if st.button(f"📄 Summarize {os.path.basename(file_path)}", key=f"summarize_btn_{file_path}"):
-                with st.spinner("Summarizing..."):
-                    summary = summarize_and_extract(restored_text)
+            if st.button(f"📄 Summarize {display_name(file_path)}", key=f"summarize_btn_{file_path}"):
+                started = time.perf_counter()
+                summary, ttft = stream_to_placeholder(summarize_and_extract_stream(restored_text), st.empty(), started)
+                if API_ERROR in summary:
+                    st.error("❌ Summary failed; nothing was stored.")  # the error text is shown above
+                else:
                     st.session_state.summary_texts[file_path] = summary # Store using full path
-                st.success("✅ Summary Generated!")
+                    st.success(f"✅ Summary Generated! (first token after {ttft:.1f}s)")
+
+            if st.button(f"⚡ Full Analysis of {display_name(file_path)} (summary, title, keywords, class)", key=f"analyze_btn_{file_path}"):
+                with st.spinner("Analyzing in a single request..."):
+                    start = time.perf_counter()
+                    try:
+                        analysis = analyze_document(restored_text)
+                    except Exception as e:
+                        st.error(f"❌ Analysis failed: {e}")
+                    else:
+                        st.session_state.summary_texts[file_path] = format_summary(analysis)
+                        st.session_state.titles[file_path] = analysis["title"]
+                        st.session_state.keywords_map[file_path] = analysis["keywords"]
+                        st.session_state.classifications[file_path] = format_classification(analysis)
+                        st.success(f"✅ Summary, title/keywords and classification ready in {time.perf_counter() - start:.1f}s (1 request instead of 3)")
 
             if file_path in st.session_state.summary_texts:
                 st.text_area("Summary", st.session_state.summary_texts[file_path], height=200)
@@ -485,9 +665,16 @@ elif section == "📑 Title & Keywords":
     if "restored_text" not in st.session_state or not st.session_state.restored_text:
         st.warning("⚠️ Please restore text first.")
     else:
+        if st.button("🎯 Extract for All Documents", key="extract_all_btn"):
+            paths = stale_paths("titles", list(st.session_state.restored_text))
+            if paths:
+                enqueue_job("extract", {"paths": paths}, f"Title/keyword extraction for {len(paths)} document(s)")
+            else:
+                st.success("✅ All titles and keywords are up to date.")
+
         for file_path, restored_text in st.session_state.restored_text.items():
-            st.subheader(f"📄 {os.path.basename(file_path)}")
-            if st.button(f"🎯 Extract for {os.path.basename(file_path)}", key=f"extract_btn_{file_path}"):
+            st.subheader(f"📄 {display_name(file_path)}")
+            if st.button(f"🎯 Extract for {display_name(file_path)}", key=f"extract_btn_{file_path}"):
                 with st.spinner("Extracting..."):
                     title, keywords = extract_title_and_keywords(restored_text)
                     st.session_state.titles[file_path] = title # Store using full path
@@ -507,18 +694,20 @@ elif section == "📦 Export":
         st.warning("⚠️ Please restore content first.")
     else:
         for file_path, content in st.session_state.restored_text.items():
-            file_name = os.path.basename(file_path)
-            export_type = st.selectbox(f"Export Format for {file_name}", ["TXT", "PDF", "JSON"], key=f"export_type_{file_name}")
-            export_data = st.radio(f"Export What for {file_name}", ["Restored Text", "Summary"], key=f"choice_data_{file_name}")
+            file_name = display_name(file_path)
+            export_type = st.selectbox(f"Export Format for {file_name}", ["TXT", "PDF", "JSON"], key=f"export_type_{file_path}")
+            export_data = st.radio(f"Export What for {file_name}", ["Restored Text", "Summary"], key=f"choice_data_{file_path}")
             text = content if export_data == "Restored Text" else st.session_state.summary_texts.get(file_path, "")
             base = "restored" if export_data == "Restored Text" else "summary"
 
             if export_type == "TXT":
-                st.download_button("📄 Download TXT", data=text, file_name=f"{base}_{file_name}.txt", key=f"dl_txt_{file_name}")
+                st.download_button("📄 Download TXT", data=text, file_name=f"{base}_{file_name}.txt", key=f"dl_txt_{file_path}")
             elif export_type == "JSON":
                 json_data = {"type": export_data, "text": text}
-                st.download_button("🧾 Download JSON", data=json.dumps(json_data, indent=2), file_name=f"{base}_{file_name}.json", key=f"dl_json_{file_name}")
+                st.download_button("🧾 Download JSON", data=json.dumps(json_data, indent=2), file_name=f"{base}_{file_name}.json", key=f"dl_json_{file_path}")
             elif export_type == "PDF":
+                from fpdf import FPDF
+
                 pdf = FPDF()
                 pdf.add_page()
                 pdf.set_auto_page_break(auto=True, margin=15)
@@ -529,12 +718,12 @@ elif section == "📦 Export":
                 cleaned_text = remove_non_latin(text)
                 for line in cleaned_text.split("\n"):
                     pdf.multi_cell(0, 10, line)
+                # Named after the stored (hash) path so sessions exporting same-named files don't collide
+                pdf_output_path = os.path.join("uploads", f"{base}_{os.path.basename(file_path)}.pdf")
                 pdf.output(pdf_output_path)
 
-                pdf_output_path = os.path.join("uploads", f"{base}_{file_name}.pdf") # Save to uploads to ensure path is correct
-                
                 with open(pdf_output_path, "rb") as f:
-                    st.download_button("📕 Download PDF", data=f, file_name=os.path.basename(pdf_output_path), mime="application/pdf", key=f"dl_pdf_{file_name}")
+                    st.download_button("📕 Download PDF", data=f, file_name=f"{base}_{file_name}.pdf", mime="application/pdf", key=f"dl_pdf_{file_path}")
 
 # --- 📂 Classify Document ---
 elif section == "📂 Classify Document":
@@ -542,9 +731,16 @@ elif section == "📂 Classify Document":
     if "restored_text" not in st.session_state or not st.session_state.restored_text:
         st.warning("⚠️ Please restore content first.")
     else:
+        if st.button("🔍 Classify All Documents", key="classify_all_btn"):
+            paths = stale_paths("classifications", list(st.session_state.restored_text))
+            if paths:
+                enqueue_job("classify", {"paths": paths}, f"Classification of {len(paths)} document(s)")
+            else:
+                st.success("✅ All classifications are up to date.")
+
         for file_path, restored in st.session_state.restored_text.items():
-            st.subheader(f"📄 {os.path.basename(file_path)}")
-            if st.button(f"🔍 Classify {os.path.basename(file_path)}", key=f"classify_btn_{file_path}"):
+            st.subheader(f"📄 {display_name(file_path)}")
+            if st.button(f"🔍 Classify {display_name(file_path)}", key=f"classify_btn_{file_path}"):
                 with st.spinner("Classifying..."):
                     result = classify_document_type(restored)
                     st.session_state.classifications[file_path] = result # Store using full path
@@ -560,10 +756,8 @@ elif section == "💬 Chat Assistant":
     if not api_key:
         st.error("🚨 GOOGLE_API_KEY not set in .env file")
     else:
-        # Initialize the generative model for chat
-        # The change is here: Directly use "gemini-pro" as the model name.
-        # The library handles the correct API version (v1) automatically.
-        model = genai.GenerativeModel("gemini-1.5-flash-latest")
+        # Chat model, shared across reruns and sessions (created on the first chat)
+        model = get_model("gemini-1.5-flash-latest")
 
         # Chat UI
         st.title("🧠 Gemini Chatbot")
@@ -573,27 +767,30 @@ elif section == "💬 Chat Assistant":
 
         user_input = st.text_input("You:", key="user_input")
 
-        if user_input:
+        for role, message in st.session_state.chat_history:
+            st.markdown(f"**{role}:** {message}")
+
+        # Only send each question once; the text input keeps its value across reruns
+        if user_input and user_input != st.session_state.get("last_chat_input"):
             try:
-                with st.spinner("Gemini is thinking..."):
-                    # For conversational turns, it's better to use chat sessions
-                    # to maintain context. If you just want single-turn responses,
-                    # model.generate_content(user_input) is fine.
-                    # For a true chatbot, you'd want to initialize a chat session:
-                    # chat = model.start_chat(history=st.session_state.chat_history)
-                    # response = chat.send_message(user_input)
-                    
-                    # For simplicity, sticking to generate_content, but be aware
-                    # it won't have conversational memory unless you manage it explicitly.
-                    response = model.generate_content(user_input)
-                    reply = response.text
-                    st.session_state.chat_history.append(("You", user_input))
-                    st.session_state.chat_history.append(("Gemini", reply))
+                # For conversational turns, it's better to use chat sessions
+                # to maintain context. If you just want single-turn responses,
+                # model.generate_content(user_input) is fine.
+                # For a true chatbot, you'd want to initialize a chat session:
+                # chat = model.start_chat(history=st.session_state.chat_history)
+                # response = chat.send_message(user_input)
+
+                # For simplicity, sticking to generate_content, but be aware
+                # it won't have conversational memory unless you manage it explicitly.
+                st.markdown(f"**You:** {user_input}")
+                started = time.perf_counter()
+                reply, ttft = stream_to_placeholder(generate_stream(model, user_input), st.empty(), started)
+                st.session_state.chat_history.append(("You", user_input))
+                st.session_state.chat_history.append(("Gemini", reply))
+                st.session_state.last_chat_input = user_input
+                st.caption(f"⚡ First token after {ttft:.1f}s")
             except Exception as e:
                 st.error(f"❌ Gemini Error: {e}")
-
-        for role, message in st.session_state.chat_history:
-            st.markdown(f"**{role}:** {message}")
 # --- 🎨 Poster Prompt Generation ---
 elif section == "🎨 Poster & Storyboard Generator":
     st.header("🎨 Generate AI Poster Prompts")
@@ -602,11 +799,11 @@ elif section == "🎨 Poster & Storyboard Generator":
         st.warning("⚠️ Please restore content first.")
     else:
         for file_path, restored_text in st.session_state.restored_text.items():
-            st.subheader(f"📄 {os.path.basename(file_path)}")
+            st.subheader(f"📄 {display_name(file_path)}")
 
             poster_key = f"poster_prompt_{file_path}"
 
-            if st.button(f"🎬 Generate Poster Prompt for {os.path.basename(file_path)}", key=f"poster_btn_{file_path}"):
+            if st.button(f"🎬 Generate Poster Prompt for {display_name(file_path)}", key=f"poster_btn_{file_path}"):
                 with st.spinner("Crafting visual scene description..."):
                     poster_prompt = restore_text_with_gemini(f"""
 You are a creative poster scene generator.
@@ -0,0 +1,85 @@
+"""
+Latency and token cost of the fused analyze_document call vs. the three-call
+path (summarize_and_extract + classify_document_type + extract_title_and_keywords).
+
+Usage: python benchmarks/bench_analysis.py path/to/restored.txt [--runs 3]
+Needs GEMINI_API_KEY. The LLM cache is bypassed so every run hits the API.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import genai.client as client
+from genai.analyze_text import analyze_document
+from genai.classify_text import classify_document_type
+from genai.summarize_text import summarize_and_extract
+from genai.title_keyword import extract_title_and_keywords
+
+usage = {"input": 0, "output": 0}
+_original_generate = client.generate_text
+_original_usage = client._usage
+
+
+def uncached_generate(model, prompt, generation_config=None, use_cache=True, **kwargs):
+    return _original_generate(model, prompt, generation_config=generation_config, use_cache=False, **kwargs)
+
+
+def counting_usage(response):
+    # Token counts come from each response's usage_metadata, so counting adds no API round trips
+    tokens_in, tokens_out = _original_usage(response)
+    usage["input"] += tokens_in
+    usage["output"] += tokens_out
+    return tokens_in, tokens_out
+
+
+def measure(fn, text, runs):
+    latencies = []
+    usage.update(input=0, output=0)
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), usage["input"] / runs, usage["output"] / runs
+
+
+def three_calls(text):
+    summarize_and_extract(text)
+    classify_document_type(text)
+    extract_title_and_keywords(text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("text_file")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    with open(args.text_file, encoding="utf-8") as f:
+        text = f.read()
+
+    modules = ["genai.analyze_text", "genai.classify_text", "genai.summarize_text", "genai.title_keyword"]
+    patches = [mock.patch(f"{name}.generate_text", uncached_generate) for name in modules]
+    patches.append(mock.patch("genai.client._usage", counting_usage))
+    for patch in patches:
+        patch.start()
+    try:
+        rows = {"three calls": measure(three_calls, text, args.runs),
+                "fused": measure(analyze_document, text, args.runs)}
+    finally:
+        for patch in patches:
+            patch.stop()
+
+    print(f"{'path':<12} {'p50 latency s':>14} {'input tokens':>13} {'output tokens':>14}")
+    for name, (latency, tokens_in, tokens_out) in rows.items():
+        print(f"{name:<12} {latency:>14.2f} {tokens_in:>13.0f} {tokens_out:>14.0f}")
+    (base_latency, base_in, _), (fused_latency, fused_in, _) = rows["three calls"], rows["fused"]
+    print(f"latency saved: {base_latency - fused_latency:.2f}s, input tokens saved: {base_in - fused_in:.0f} "
+          f"({(1 - fused_in / base_in) * 100 if base_in else 0:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Throughput benchmark for perform_ocr_batch: pages/sec vs. worker count.
+
+Usage: python benchmarks/bench_batch_ocr.py [folder_with_images] [--pages 40]
+Without a folder, synthetic text pages are rendered into a temp directory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from ocr.ocr_utils import perform_ocr, perform_ocr_batch
+
+SAMPLE_LINES = [
+    "The council met on the fourteenth day of March in the year 1887",
+    "to consider the petition of the merchants of the northern ward.",
+    "It was resolved that the bridge be repaired before the winter.",
+    "Signed by the clerk and witnessed by two members of the board.",
+]
+
+
+def make_synthetic_pages(folder, count):
+    paths = []
+    for i in range(count):
+        page = Image.new("RGB", (1700, 2200), "white")
+        draw = ImageDraw.Draw(page)
+        for row in range(40):
+            draw.text((100, 100 + row * 50), f"{i}.{row} " + SAMPLE_LINES[row % len(SAMPLE_LINES)], fill="black")
+        path = os.path.join(folder, f"page_{i:03d}.png")
+        page.save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--psm", type=int, default=3)
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.folder:
+            paths = sorted(os.path.join(args.folder, f) for f in os.listdir(args.folder)
+                           if f.lower().endswith((".png", ".jpg", ".jpeg")))[:args.pages]
+        else:
+            paths = make_synthetic_pages(tmp, args.pages)
+
+        serial = {p: perform_ocr(p, psm=args.psm, lang=args.lang, use_cache=False) for p in paths}
+
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+        baseline = None
+        print(f"{len(paths)} pages, {cores} cores")
+        print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8} {'identical':>10}")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            results = {r.key: (r.text, r.accuracy) for r in
+                       perform_ocr_batch(paths, psm=args.psm, lang=args.lang,
+                                         max_workers=workers, use_cache=False)}
+            elapsed = time.perf_counter() - start
+            rate = len(paths) / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>8} {elapsed:>9.2f} {rate:>9.2f} {rate / baseline:>7.2f}x {str(results == serial):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Offline embeddings throughput: chunks/sec for building a FAISS store with the
+local hashing backend, and p50/p99 query latency against that store.
+
+Usage: python benchmarks/bench_embeddings.py [--folder knowledge] [--queries 200] [--provider local]
+Runs fully offline with --provider local; "openai" needs OPENAI_API_KEY.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+
+from genai.embeddings import get_embeddings
+
+SAMPLE = (
+    "The council met on the third day of March to hear the petition of the merchants "
+    "concerning the repair of the old stone bridge over the river. Witnesses testified "
+    "that the land records of the northern district had been damaged by water. "
+)
+
+
+def load_chunks(folder):
+    texts = []
+    if os.path.isdir(folder):
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".txt"):
+                with open(os.path.join(folder, filename), encoding="utf-8", errors="ignore") as f:
+                    texts.append(f.read())
+    if not texts:
+        texts = [SAMPLE * 40 for _ in range(25)]
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    return splitter.split_text("\n\n".join(texts))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", default="knowledge")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--provider", default="local")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.folder)
+    embeddings = get_embeddings(args.provider)
+
+    start = time.perf_counter()
+    store = FAISS.from_texts(chunks, embeddings)
+    elapsed = time.perf_counter() - start
+    print(f"build   {len(chunks)} chunks in {elapsed:.2f}s  ->  {len(chunks) / elapsed:,.0f} chunks/s")
+
+    timings = []
+    for i in range(args.queries):
+        query = chunks[i % len(chunks)][:300]
+        start = time.perf_counter()
+        store.similarity_search(query, k=2)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"query   p50 {statistics.median(timings):.2f} ms   p99 {percentile(timings, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
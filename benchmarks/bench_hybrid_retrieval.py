@@ -0,0 +1,73 @@
+"""
+Retrieval quality and latency: vector-only vs. BM25-only vs. hybrid (RRF).
+Queries are 8-word snippets of indexed chunks with OCR-style character noise;
+a query is a hit when its source chunk comes back in the top k.
+
+Usage: python benchmarks/bench_hybrid_retrieval.py [--queries 200] [--k 5] [--noise 0.08]
+Needs a rag_vector_db built by vector_store_builder.py (which writes the BM25 index).
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from genai.retriever import get_retriever
+
+
+def noisy_snippet(text, rng, noise, words=8):
+    tokens = text.split()
+    start = rng.randrange(max(1, len(tokens) - words))
+    chars = list(" ".join(tokens[start:start + words]))
+    for i, ch in enumerate(chars):
+        if ch.isalpha() and rng.random() < noise:
+            chars[i] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.08)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    retriever = get_retriever()
+    store = retriever.get_store()
+    if retriever.bm25 is None:
+        print("No BM25 index in rag_vector_db; rebuild it with vector_store_builder.py")
+        return
+    rng = random.Random(args.seed)
+    positions = rng.sample(sorted(store.index_to_docstore_id), min(args.queries, len(store.index_to_docstore_id)))
+    queries = [(pos, noisy_snippet(store.docstore.search(store.index_to_docstore_id[pos]).page_content,
+                                   rng, args.noise)) for pos in positions]
+
+    print(f"{len(queries)} queries, k={args.k}, noise={args.noise}")
+    for mode in ("vector", "bm25", "hybrid"):
+        hits, reciprocal_ranks, timings = 0, [], []
+        for pos, query in queries:
+            start = time.perf_counter()
+            found = retriever.search_positions(query, k=args.k, mode=mode)
+            timings.append((time.perf_counter() - start) * 1000)
+            if pos in found:
+                hits += 1
+                reciprocal_ranks.append(1 / (found.index(pos) + 1))
+            else:
+                reciprocal_ranks.append(0.0)
+        print(f"{mode:<7} recall@{args.k} {hits / len(queries):.3f}   MRR {statistics.mean(reciprocal_ranks):.3f}   "
+              f"p50 {statistics.median(timings):.2f} ms   p99 {percentile(timings, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
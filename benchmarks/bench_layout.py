@@ -0,0 +1,61 @@
+"""
+Wall-clock time for a single large multi-column page: monolithic --psm 3
+vs. layout-aware block splitting with concurrent per-block OCR.
+
+Usage: python benchmarks/bench_layout.py [image_path] [--columns 3] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from ocr.ocr_utils import perform_ocr_detailed
+
+TEXT = ("The harbour commission reported that the new pier was opened to traffic "
+        "on Saturday last in the presence of a large crowd of citizens").split()
+
+
+def render_newspaper(columns, dpi=300):
+    width, height = int(11 * dpi), int(17 * dpi)
+    page = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(page)
+    try:
+        font = ImageFont.truetype("DejaVuSerif.ttf", dpi // 7)
+        headline = ImageFont.truetype("DejaVuSerif.ttf", dpi // 3)
+    except OSError:
+        font = headline = ImageFont.load_default()
+    draw.text((dpi // 2, dpi // 2), "THE EVENING CHRONICLE", fill="black", font=headline)
+    gutter = dpi // 3
+    column_width = (width - dpi - gutter * (columns - 1)) // columns
+    line_height = int(dpi / 7 * 1.5)
+    for column in range(columns):
+        x = dpi // 2 + column * (column_width + gutter)
+        for row in range((height - 2 * dpi) // line_height):
+            words = [TEXT[(row * 3 + column + i) % len(TEXT)] for i in range(5)]
+            draw.text((x, int(1.5 * dpi) + row * line_height), " ".join(words), fill="black", font=font)
+    page.info["dpi"] = (dpi, dpi)
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image", nargs="?")
+    parser.add_argument("--columns", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    page = Image.open(args.image) if args.image else render_newspaper(args.columns)
+    for label, layout in [("monolithic psm 3", False), ("layout-aware", True)]:
+        start = time.perf_counter()
+        result = perform_ocr_detailed(page, psm=3, use_cache=False, layout=layout, layout_workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<18} {elapsed:>7.2f}s  blocks={len(result['blocks']):<3} "
+              f"words={len(result['words']):<5} timings={result['timings']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-call overhead of the OCR engines on small crops.
+
+Usage: python benchmarks/bench_ocr_engines.py [--calls 50] [--lang eng]
+Renders a single text line (a typical cropped region) and times repeated
+image_to_data calls through each available engine.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from ocr.engines import get_engine
+
+
+def make_crop(width, height):
+    crop = Image.new("L", (width, height), 255)
+    ImageDraw.Draw(crop).text((10, height // 3), "Resolved at the council, March 1887", fill=0)
+    return np.array(crop)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+
+    sizes = [(300, 40), (600, 80), (1200, 300)]
+    print(f"{'engine':<12} {'crop':>10} {'p50 ms':>8} {'mean ms':>8} {'first ms':>9}")
+    for name in ["pytesseract", "tesserocr"]:
+        try:
+            engine = get_engine(name)
+        except ImportError:
+            print(f"{name:<12} not installed")
+            continue
+        for width, height in sizes:
+            crop = make_crop(width, height)
+            timings = []
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                engine.image_to_data(crop, psm=7, lang=args.lang)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{name:<12} {f'{width}x{height}':>10} {statistics.median(timings):>8.1f} "
+                  f"{statistics.mean(timings):>8.1f} {timings[0]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
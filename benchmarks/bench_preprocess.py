@@ -0,0 +1,82 @@
+"""
+Preprocessing latency and OCR accuracy: legacy full-resolution fastNlMeansDenoising
+pipeline vs. the configurable pipeline in ocr/preprocess.py.
+
+Usage: python benchmarks/bench_preprocess.py [--pages 5] [--dpi 600] [--noise 8]
+Synthetic pages are rendered at the requested DPI with Gaussian noise so that
+accuracy can be scored against known ground truth.
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+from ocr.ocr_utils import parse_tesseract_data
+from ocr.preprocess import build_pipeline, legacy_pipeline
+
+WORDS = ("the council resolved that the northern bridge be repaired before winter "
+         "and that the merchants petition of 1887 be entered in the minutes").split()
+
+
+def render_page(seed, dpi, noise):
+    rng = np.random.default_rng(seed)
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    size = int(dpi / 6)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        font = ImageFont.load_default()
+    lines = []
+    for row in range(30):
+        line = " ".join(rng.choice(WORDS, 8))
+        draw.text((dpi // 2, dpi // 2 + row * int(size * 1.6)), line, fill=0, font=font)
+        lines.append(line)
+    pixels = np.array(page, dtype=np.float32) + rng.normal(0, noise, (height, width))
+    return np.clip(pixels, 0, 255).astype(np.uint8), "\n".join(lines)
+
+
+def score(truth, text):
+    return difflib.SequenceMatcher(None, " ".join(truth.split()), " ".join(text.split())).ratio() * 100
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--dpi", type=int, default=600)
+    parser.add_argument("--noise", type=float, default=8.0)
+    args = parser.parse_args()
+
+    pipelines = {
+        "legacy (nlmeans, full res)": legacy_pipeline(),
+        "default (auto)": build_pipeline(),
+        "median + adaptive": build_pipeline(denoise_method="median", threshold_method="adaptive"),
+        "bilateral + otsu": build_pipeline(denoise_method="bilateral"),
+    }
+    pages = [render_page(i, args.dpi, args.noise) for i in range(args.pages)]
+
+    print(f"{args.pages} pages at {args.dpi} DPI, noise sigma {args.noise}")
+    print(f"{'pipeline':<28} {'preprocess ms':>14} {'tesseract ms':>13} {'accuracy %':>11}")
+    for name, pipeline in pipelines.items():
+        prep_ms, ocr_ms, accuracy = [], [], []
+        for image, truth in pages:
+            start = time.perf_counter()
+            processed, _ = pipeline.run(image, dpi=args.dpi)
+            prep_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            data = pytesseract.image_to_data(processed, config="--psm 3", output_type=pytesseract.Output.DICT)
+            ocr_ms.append((time.perf_counter() - start) * 1000)
+            accuracy.append(score(truth, parse_tesseract_data(data)[0]))
+        print(f"{name:<28} {np.mean(prep_ms):>14.1f} {np.mean(ocr_ms):>13.1f} {np.mean(accuracy):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
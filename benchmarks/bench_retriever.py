@@ -0,0 +1,65 @@
+"""
+Per-restoration retrieval latency: the old per-call FAISS.load_local path vs.
+the warm process-wide retriever (with its query embedding cache), and the
+whole-document multi-query search (one batched embed + FAISS call + MMR).
+
+Usage: python benchmarks/bench_retriever.py [--queries 20]
+Needs a built rag_vector_db and whatever key its embeddings provider requires.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.vectorstores import FAISS
+
+from genai.embeddings import get_embeddings, load_provider
+from genai.restore_text import retrieve_document_context
+from genai.retriever import get_retriever
+
+QUERIES = [
+    "The treaty was signed by the council in the presence of witnesses",
+    "Land records of the northern district in the year 1887",
+    "Petition of the merchants concerning the repair of the bridge",
+    "Minutes of the annual meeting of the historical society",
+]
+
+
+def per_call(query):
+    embeddings = get_embeddings(load_provider("rag_vector_db"))
+    vectorstore = FAISS.load_local("rag_vector_db", embeddings, allow_dangerous_deserialization=True)
+    return vectorstore.similarity_search(query, k=2)
+
+
+def warm(query):
+    return get_retriever().similarity_search(query, k=2)
+
+
+def whole_document(query):
+    # A multi-page document: every sample sentence, repeated, with the query first
+    document = "\n\n".join([query] + QUERIES * 10)
+    return retrieve_document_context(document)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+
+    for name, fn in [("load per call", per_call), ("warm retriever", warm), ("whole document", whole_document)]:
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<16} first {timings[0]:>8.1f} ms   p50 {statistics.median(timings):>8.1f} ms   "
+              f"mean {statistics.mean(timings):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start cost of the app: import time of each module in a fresh interpreter,
+and time to first render of app.py (Streamlit's AppTest, default section).
+
+Usage: python benchmarks/bench_startup.py [--runs 3] [--budget 2.0]
+With --budget (seconds) the script exits non-zero when the first render is
+slower, so it can guard against heavy imports creeping back into app.py.
+Modules that aren't installed are reported as missing rather than timed.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "streamlit",
+    "genai.client",
+    "genai.restore_text",
+    "genai.analyze_text",
+    "genai.summarize_text",
+    "genai.classify_text",
+    "genai.title_keyword",
+    "store.result_store",
+    "store.job_queue",
+    "ocr.ingest",
+    "worker",
+    # Deferred: should only be paid by the sections that use them
+    "google.generativeai",
+    "genai.retriever",
+    "ocr.ocr_utils",
+    "cv2",
+    "fpdf",
+    "streamlit_cropper",
+]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+RENDER_SNIPPET = """
+import time
+from streamlit.testing.v1 import AppTest
+t = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120).run()
+elapsed = time.perf_counter() - t
+if at.exception:
+    raise SystemExit(str(at.exception[0].value))
+print(elapsed)
+"""
+
+
+def time_in_subprocess(code):
+    """Seconds printed by code run in a fresh interpreter, or the error's last line if it failed."""
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = (proc.stderr or proc.stdout).strip().splitlines()
+        return None, lines[-1] if lines else f"exit code {proc.returncode}"
+    return float(proc.stdout.strip().splitlines()[-1]), None
+
+
+def median_time(code, runs):
+    times = []
+    for _ in range(runs):
+        elapsed, error = time_in_subprocess(code)
+        if error:
+            return None, error
+        times.append(elapsed)
+    return statistics.median(times), None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=None, help="fail if the first render takes longer (s)")
+    args = parser.parse_args()
+
+    print(f"{'module':<22} import (p50)")
+    for module in MODULES:
+        elapsed, error = median_time(IMPORT_SNIPPET.format(module=module), args.runs)
+        print(f"{module:<22} " + (f"{elapsed * 1000:8.0f} ms" if error is None else f"   missing ({error})"))
+
+    elapsed, error = median_time(RENDER_SNIPPET, args.runs)
+    if error:
+        print(f"\nfirst render of app.py failed: {error}")
+        sys.exit(1)
+    print(f"\nfirst render of app.py (p50): {elapsed:.2f}s")
+    if args.budget is not None and elapsed > args.budget:
+        print(f"over the {args.budget:.2f}s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
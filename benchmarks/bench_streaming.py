@@ -0,0 +1,47 @@
+"""
+Time-to-first-token of the streaming restoration vs. time-to-full-response of
+the blocking call, for the same damaged text.
+
+Usage: python benchmarks/bench_streaming.py path/to/damaged.txt [--runs 3]
+Needs GEMINI_API_KEY. The LLM cache is bypassed so every run hits the API.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from genai.client import generate_stream, generate_text, get_model
+from genai.restore_text import RESTORE_MODEL, _restoration_prompt
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("text_file")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    with open(args.text_file, encoding="utf-8") as f:
+        prompt = _restoration_prompt(f.read(), "simple")
+    gemini_model = get_model(RESTORE_MODEL)
+
+    blocking, ttft, streamed_total = [], [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        generate_text(gemini_model, prompt, use_cache=False)
+        blocking.append(time.perf_counter() - start)
+
+        stats = {}
+        for _ in generate_stream(gemini_model, prompt, use_cache=False, stats=stats):
+            pass
+        ttft.append(stats["ttft"])
+        streamed_total.append(stats["total"])
+
+    print(f"blocking response (p50):      {statistics.median(blocking):.2f}s")
+    print(f"streaming first token (p50):  {statistics.median(ttft):.2f}s")
+    print(f"streaming complete (p50):     {statistics.median(streamed_total):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
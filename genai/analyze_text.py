@@ -0,0 +1,117 @@
+# genai/analyze_text.py
+
+import json
+
+from genai.client import generate_text, generate_many, get_model
+from genai.prompting import fit_document
+
+CATEGORIES = ["Legal", "Historical", "Academic", "General"]
+
+# Field name -> expected Python type of the parsed JSON value
+ANALYSIS_SCHEMA = {
+    "summary": str,
+    "title": str,
+    "author": str,
+    "date": str,
+    "keywords": list,
+    "domain": str,
+    "category": str,
+    "reason": str,
+}
+
+GENERATION_CONFIG = {"response_mime_type": "application/json", "temperature": 0}
+
+
+def validate_analysis(data):
+    """Check the parsed response against ANALYSIS_SCHEMA and normalize it; raises ValueError if unusable."""
+    if not isinstance(data, dict):
+        raise ValueError("Analysis response is not a JSON object")
+    missing = [field for field in ANALYSIS_SCHEMA if field not in data]
+    if missing:
+        raise ValueError(f"Analysis response is missing fields: {', '.join(missing)}")
+
+    if isinstance(data["keywords"], str):
+        data["keywords"] = [kw.strip() for kw in data["keywords"].split(",") if kw.strip()]
+    for field, expected in ANALYSIS_SCHEMA.items():
+        if not isinstance(data[field], expected):
+            raise ValueError(f"Analysis field '{field}' should be {expected.__name__}")
+    data["keywords"] = [str(kw).strip() for kw in data["keywords"] if str(kw).strip()]
+
+    for field in ("domain", "category"):
+        match = next((c for c in CATEGORIES if c.lower() == data[field].strip().lower()), None)
+        data[field] = match or "General"
+    return {field: data[field] for field in ANALYSIS_SCHEMA}
+
+
+def _analysis_prompt(text):
+    text = fit_document(text, "analysis")
+    return f"""
+You are a smart AI document assistant.
+
+Analyze the document below. Only use the content provided and do NOT hallucinate.
+If a field is not present in the document, use "Not found".
+
+--- Document Start ---
+{text}
+--- Document End ---
+
+Return ONLY a JSON object with exactly these fields:
+{{
+  "summary": "<2-3 line summary>",
+  "title": "<concise, informative title, max 12 words>",
+  "author": "<author or signatory, person or organization>",
+  "date": "<any date mentioned>",
+  "keywords": ["<5 to 10 relevant keywords>"],
+  "domain": "<one of: {', '.join(CATEGORIES)}>",
+  "category": "<best matching document category, one of: {', '.join(CATEGORIES)}>",
+  "reason": "<short reason for the category>"
+}}
+"""
+
+
+def _parse_analysis(output):
+    output = output.strip()
+    # Tolerate a fenced ```json block even though JSON mode was requested
+    if output.startswith("```"):
+        output = output.strip("`").removeprefix("json").strip()
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Analysis response is not valid JSON: {e}") from e
+    return validate_analysis(data)
+
+
+def analyze_document(text):
+    """
+    One Gemini request returning summary, metadata, category and title/keywords
+    as strict JSON, replacing summarize_and_extract + classify_document_type +
+    extract_title_and_keywords (three uploads of the same document).
+    """
+    # Validated before it is cached, so one malformed reply doesn't stick to the document for the cache TTL
+    return _parse_analysis(generate_text(get_model(), _analysis_prompt(text), generation_config=GENERATION_CONFIG,
+                                         validate=_parse_analysis))
+
+
+def analyze_many(texts):
+    """Analyze many documents concurrently; invalid or failed items come back as exception objects."""
+    results = generate_many(get_model(), [_analysis_prompt(text) for text in texts], generation_config=GENERATION_CONFIG,
+                            validate=_parse_analysis)
+    return [r if isinstance(r, Exception) else _parse_analysis(r) for r in results]
+
+
+def format_summary(analysis):
+    """Render an analysis in the same layout summarize_and_extract returns."""
+    return f"""Summary:
+{analysis['summary']}
+
+Metadata:
+- Title: {analysis['title']}
+- Author/Signatory: {analysis['author']}
+- Date: {analysis['date']}
+- Keywords: {', '.join(analysis['keywords']) or 'Not found'}
+- Domain: {analysis['domain']}"""
+
+
+def format_classification(analysis):
+    """Render an analysis in the same layout classify_document_type returns."""
+    return f"Category: {analysis['category']}\nReason: {analysis['reason']}"
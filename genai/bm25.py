@@ -0,0 +1,111 @@
+# genai/bm25.py
+
+import os
+import re
+import shutil
+from collections import Counter
+
+import numpy as np
+
+BM25_DIR = "bm25"
+TOKEN = re.compile(r"\w+")
+_ARRAYS = ("terms", "keys", "offsets", "doc_ids", "tfs", "doc_len")
+
+
+def tokenize(text):
+    """Lowercased word tokens; no stemming, so archaic spellings and names stay exact."""
+    return TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk texts, stored as flat NumPy arrays (CSR postings):
+    terms is the sorted vocabulary, and the postings of terms[t] are
+    doc_ids/tfs[offsets[t]:offsets[t + 1]]. keys maps a doc number back to its
+    docstore id. Arrays are memory-mapped on load, so opening a large index is
+    cheap and a lookup only touches the postings of the query terms.
+    """
+
+    def __init__(self, terms, keys, offsets, doc_ids, tfs, doc_len, k1=1.5, b=0.75):
+        self.terms = terms
+        self.keys = keys
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 1.0
+
+    @classmethod
+    def build(cls, items):
+        """Index (key, text) pairs."""
+        keys, counts = [], []
+        for key, text in items:
+            keys.append(key)
+            counts.append(Counter(tokenize(text)))
+        terms = sorted(set().union(*counts)) if counts else []
+        term_ids = {term: i for i, term in enumerate(terms)}
+
+        rows = np.fromiter((term_ids[t] for c in counts for t in c), dtype=np.int64)
+        docs = np.repeat(np.arange(len(counts), dtype=np.int32), [len(c) for c in counts])
+        tfs = np.fromiter((n for c in counts for n in c.values()), dtype=np.float32)
+        order = np.argsort(rows, kind="stable")  # stable keeps each posting list in doc order
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(terms)))]).astype(np.int64)
+        doc_len = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        return cls(np.array(terms, dtype=str), np.array(keys, dtype=str), offsets,
+                   docs[order], tfs[order], doc_len)
+
+    def save(self, path):
+        """Write the arrays to path/bm25, replacing any previous index in one rename."""
+        target = os.path.join(path, BM25_DIR)
+        tmp = target + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in _ARRAYS:
+            np.save(os.path.join(tmp, name + ".npy"), getattr(self, name))
+        if os.path.exists(target):
+            shutil.rmtree(target + ".old", ignore_errors=True)
+            os.replace(target, target + ".old")
+            os.replace(tmp, target)
+            shutil.rmtree(target + ".old", ignore_errors=True)
+        else:
+            os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-mapped index from path/bm25, or None if it was never built."""
+        directory = os.path.join(path, BM25_DIR)
+        if not os.path.isdir(directory):
+            return None
+        return cls(*(np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in _ARRAYS))
+
+    def search(self, query, k=10):
+        """Top-k (key, score) pairs for query, best first."""
+        if not len(self.keys):
+            return []
+        tokens = np.array(sorted(set(tokenize(query))), dtype=str)
+        if not len(tokens):
+            return []
+        positions = np.searchsorted(self.terms, tokens)
+        found = positions < len(self.terms)
+        found[found] = self.terms[positions[found]] == tokens[found]
+        term_ids = positions[found]
+        if not len(term_ids):
+            return []
+
+        scores = np.zeros(len(self.keys), dtype=np.float32)
+        for t in term_ids:
+            start, end = self.offsets[t], self.offsets[t + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            idf = np.log1p((len(self.keys) - (end - start) + 0.5) / ((end - start) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avg_len)
+            # Each doc appears once per posting list, so plain fancy-index += is safe
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(str(self.keys[i]), float(scores[i])) for i in hits]
@@ -0,0 +1,129 @@
+# genai/chunking.py
+
+import re
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+WORD_TOKEN = re.compile(r"\S+\s*")
+
+
+def _units(text, max_chars):
+    """Paragraphs, falling back to sentences and then words for anything longer than max_chars."""
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            yield paragraph, "\n\n"
+            continue
+        for sentence in SENTENCE_END.split(paragraph):
+            if len(sentence) <= max_chars:
+                yield sentence, " "
+                continue
+            words = sentence.split()
+            piece = []
+            for word in words:
+                if piece and len(" ".join(piece + [word])) > max_chars:
+                    yield " ".join(piece), " "
+                    piece = []
+                piece.append(word)
+            if piece:
+                yield " ".join(piece), " "
+        # Paragraph boundary after the last sentence of an oversized paragraph
+        yield "", "\n\n"
+
+
+def _split(text, max_chars, overlap_chars):
+    """Chunks as lists of (unit, separator), plus how many leading units each one repeats from the previous."""
+    chunks, repeated, current, size, overlap_units = [], [], [], 0, 0
+    for unit, separator in _units(text, max_chars):
+        if not unit:
+            if current:
+                current[-1] = (current[-1][0], "\n\n")
+            continue
+        if current and size + len(unit) > max_chars:
+            chunks.append(current)
+            repeated.append(overlap_units)
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                if overlap_size + len(previous[0]) > overlap_chars:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += len(previous[0])
+            current, size, overlap_units = overlap, overlap_size, len(overlap)
+        current.append((unit, separator))
+        size += len(unit) + len(separator)
+    if current:
+        chunks.append(current)
+        repeated.append(overlap_units)
+    return chunks, repeated
+
+
+def _join(units):
+    return "".join(u + s for u, s in units).strip()
+
+
+def split_text(text, max_chars=3000, overlap_chars=300):
+    """
+    Split text into chunks of at most ~max_chars at paragraph/sentence boundaries.
+    Each chunk after the first repeats the trailing units of the previous one,
+    up to overlap_chars, so the model sees context across the cut.
+    Returns the chunk strings in document order.
+    """
+    return split_text_with_overlaps(text, max_chars, overlap_chars)[0]
+
+
+def split_text_with_overlaps(text, max_chars=3000, overlap_chars=300):
+    """split_text, plus the text each chunk repeats from the previous one ("" for the first); see stitch_chunks."""
+    chunks, repeated = _split(text, max_chars, overlap_chars)
+    return [_join(chunk) for chunk in chunks], [_join(chunk[:n]) for chunk, n in zip(chunks, repeated)]
+
+
+def _normalize(word):
+    return re.sub(r"\W+", "", word.lower())
+
+
+def _overlap_match(tail, head, expected, min_match):
+    """
+    (k, b) such that the last k words of tail equal head[b:b + k] and b + k, the
+    part of head that is overlap, is within a few words of expected; the longest
+    such k wins. None if there is no match of at least min_match words.
+    """
+    slack = max(3, expected // 5)
+    for k in range(min(len(tail), expected + slack), min_match - 1, -1):
+        suffix = tail[-k:]
+        for b in range(max(0, expected - slack - k), min(len(head) - k, expected + slack - k) + 1):
+            if head[b:b + k] == suffix:
+                return k, b
+    return None
+
+
+def stitch_chunks(texts, overlaps, min_match=4):
+    """
+    Join restored chunks, dropping the text each chunk repeats from the end of
+    the previous one. overlaps[i] is the text chunk i repeated from chunk i - 1
+    before restoration (from split_text_with_overlaps). The repeat is only cut
+    where a run of at least min_match words ends exactly at the end of the text
+    so far and ends at about len(overlaps[i]) words into the next chunk, so
+    recurring phrases elsewhere never line up; otherwise the chunks are simply
+    concatenated (a repeated sentence is better than a lost one).
+    """
+    if not texts:
+        return ""
+    # Tokens keep their trailing whitespace so paragraph breaks survive the join
+    words = WORD_TOKEN.findall(texts[0].strip() + "\n\n")
+    for text, overlap in zip(texts[1:], overlaps[1:]):
+        nxt = WORD_TOKEN.findall(text.strip() + "\n\n")
+        expected = len(overlap.split())
+        match = None
+        if expected >= min_match:
+            window = expected + max(3, expected // 5)
+            match = _overlap_match([_normalize(w) for w in words[-window:]],
+                                   [_normalize(w) for w in nxt[:window]], expected, min_match)
+        if match:
+            # The text so far without the matched run, then the next chunk from that run on
+            k, b = match
+            words = words[:len(words) - k] + nxt[b:]
+        else:
+            words = words + nxt
+    return "".join(words).strip()
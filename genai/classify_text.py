@@ -1,24 +1,12 @@
 # genai/classify_text.py
 
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
+from genai.client import generate_text, generate_many, get_model
+from genai.prompting import fit_document
 
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-# Use Gemini 1.5 Flash model
-model = genai.GenerativeModel(model_name="models/gemini-1.5-flash-latest")
-
-def classify_document_type(text):
-    global model
-    if model is None:
-        model = genai.GenerativeModel(model_name="models/gemini-1.5-flash-latest")
-
-    prompt = f"""You are an intelligent AI trained to classify documents into one of the following categories:
+def _classification_prompt(text):
+    # A representative sample is enough to pick a category
+    text = fit_document(text, "classify")
+    return f"""You are an intelligent AI trained to classify documents into one of the following categories:
 - Legal
 - Historical
 - Academic
@@ -33,5 +21,13 @@ Read the following text and assign the most appropriate category. Also explain w
 Return output in this format:
 Category: <Best match>
 Reason: <Short reason>"""
-    response = model.generate_content(prompt)
-    return response.text.strip()
+
+
+def classify_document_type(text):
+    return generate_text(get_model(), _classification_prompt(text)).strip()
+
+
+def classify_many(texts):
+    """Classify many documents concurrently within the shared rate limit; failed items come back as exceptions."""
+    results = generate_many(get_model(), [_classification_prompt(text) for text in texts])
+    return [r if isinstance(r, Exception) else r.strip() for r in results]
@@ -0,0 +1,271 @@
+# genai/client.py
+
+import asyncio
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+from genai.llm_cache import get_llm_cache, make_llm_key
+
+# Quota settings: match these to the Gemini project's limits
+MAX_CONCURRENCY = int(os.getenv("ECOSCRIBE_LLM_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("ECOSCRIBE_LLM_RPM", "60"))
+MAX_RETRIES = int(os.getenv("ECOSCRIBE_LLM_MAX_RETRIES", "5"))
+REQUEST_DEADLINE = float(os.getenv("ECOSCRIBE_LLM_DEADLINE", "120"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+DEFAULT_MODEL = "models/gemini-1.5-flash-latest"
+
+logger = logging.getLogger(__name__)
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_name=DEFAULT_MODEL):
+    """
+    Process-wide GenerativeModel for model_name. google.generativeai is imported
+    and configured on first use, not at import time, so pages that never call
+    Gemini don't pay for it; a missing GEMINI_API_KEY is reported here too.
+    """
+    with _models_lock:
+        if model_name not in _models:
+            import google.generativeai as genai
+            from dotenv import load_dotenv
+
+            if not _models:
+                load_dotenv()
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("🚨 GEMINI_API_KEY is not set in the .env file")
+                genai.configure(api_key=api_key)
+            _models[model_name] = genai.GenerativeModel(model_name=model_name)
+        return _models[model_name]
+
+
+@lru_cache(maxsize=None)
+def _retryable_errors():
+    from google.api_core import exceptions as api_exceptions
+
+    return (
+        api_exceptions.ResourceExhausted,
+        api_exceptions.TooManyRequests,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.DeadlineExceeded,
+        asyncio.TimeoutError,
+        TimeoutError,
+    )
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by sync and async callers.
+    reserve() books a slot and returns how long the caller must wait for it,
+    so requests are spread evenly instead of bursting into a 429.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1.0, min(rate_per_minute / 6, MAX_CONCURRENCY))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+rate_limiter = TokenBucket(REQUESTS_PER_MINUTE)
+_semaphores = weakref.WeakKeyDictionary()
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def run_async(coro):
+    """
+    Run coro on the process-wide background event loop and return its result.
+    The SDK's async gRPC client binds to the first loop that uses it, and the models
+    from get_model() are shared, so every batch runs on this one long-lived loop
+    instead of a fresh asyncio.run() loop per call. A forked process starts its own.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop, _loop_pid = asyncio.new_event_loop(), os.getpid()
+            threading.Thread(target=_loop.run_forever, name="genai-event-loop", daemon=True).start()
+        loop = _loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def _semaphore():
+    # asyncio primitives are bound to one event loop; keep one per loop
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _semaphores[loop]
+
+
+def _backoff(attempt):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _usage(response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0
+    return getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0
+
+
+def _cached(cache, key, validate):
+    if cache is None:
+        return None
+    cached = cache.get(key)
+    if cached is not None and validate is not None:
+        try:
+            validate(cached)
+        except ValueError:
+            return None  # unusable entry (e.g. cached before validation existed); ask again and overwrite it
+    return cached
+
+
+def _store(cache, key, model, response, started, validate=None):
+    text = response.text
+    input_tokens, output_tokens = _usage(response)
+    logger.info("Gemini %s: %d input / %d output tokens in %.2fs", model.model_name, input_tokens, output_tokens,
+                time.perf_counter() - started)
+    if validate is not None:
+        validate(text)  # raises ValueError; a reply the caller can't use is never cached
+    if cache is not None and text:
+        cache.put(key, model.model_name, text, input_tokens, output_tokens)
+    return text
+
+
+def generate_text(model, prompt, generation_config=None, use_cache=True, deadline=REQUEST_DEADLINE, validate=None):
+    """
+    Single entry point for Gemini calls: returns the response text, serving
+    byte-identical (model, prompt, generation_config) requests from the LLM cache.
+    Calls are rate limited and retried with backoff on quota/transient errors;
+    deadline bounds each attempt in seconds. validate (optional) is called with
+    the text and raises ValueError if it is unusable; such replies are not cached.
+    """
+    cache = get_llm_cache() if use_cache else None
+    key = make_llm_key(model.model_name, prompt, generation_config)
+    cached = _cached(cache, key, validate)
+    if cached is not None:
+        return cached
+
+    for attempt in range(MAX_RETRIES + 1):
+        time.sleep(rate_limiter.reserve())
+        started = time.perf_counter()
+        try:
+            response = model.generate_content(prompt, generation_config=generation_config,
+                                              request_options={"timeout": deadline})
+            return _store(cache, key, model, response, started, validate)
+        except _retryable_errors():
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+
+
+async def agenerate_text(model, prompt, generation_config=None, use_cache=True, deadline=REQUEST_DEADLINE,
+                         validate=None):
+    """Async twin of generate_text; concurrency is capped at MAX_CONCURRENCY per event loop."""
+    cache = get_llm_cache() if use_cache else None
+    key = make_llm_key(model.model_name, prompt, generation_config)
+    cached = _cached(cache, key, validate)
+    if cached is not None:
+        return cached
+
+    for attempt in range(MAX_RETRIES + 1):
+        async with _semaphore():
+            await asyncio.sleep(rate_limiter.reserve())
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, generation_config=generation_config), deadline)
+                return _store(cache, key, model, response, started, validate)
+            except _retryable_errors():
+                if attempt == MAX_RETRIES:
+                    raise
+        # Back off outside the semaphore so other requests keep the quota busy
+        await asyncio.sleep(_backoff(attempt))
+
+
+async def agenerate_many(model, prompts, generation_config=None, use_cache=True, deadline=REQUEST_DEADLINE,
+                         validate=None):
+    """Run many prompts concurrently; results come back in prompt order, failures as exception objects."""
+    return await asyncio.gather(
+        *(agenerate_text(model, p, generation_config, use_cache, deadline, validate) for p in prompts),
+        return_exceptions=True,
+    )
+
+
+def generate_many(model, prompts, generation_config=None, use_cache=True, deadline=REQUEST_DEADLINE, validate=None):
+    """Blocking wrapper around agenerate_many for Streamlit handlers and scripts."""
+    return run_async(agenerate_many(model, prompts, generation_config, use_cache, deadline, validate))
+
+
+def generate_stream(model, prompt, generation_config=None, use_cache=True, deadline=REQUEST_DEADLINE, stats=None):
+    """
+    Streaming variant of generate_text: yields text chunks as Gemini produces them.
+    The full text is cached once the stream completes; a cache hit is yielded as one chunk.
+    Retries only happen before the first chunk, since partial output can't be taken back.
+    stats (optional dict) receives "ttft" and "total" in seconds plus "cached".
+    """
+    stats = stats if stats is not None else {}
+    start = time.perf_counter()
+    cache = get_llm_cache() if use_cache else None
+    key = make_llm_key(model.model_name, prompt, generation_config)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            stats.update(ttft=time.perf_counter() - start, total=time.perf_counter() - start, cached=True)
+            yield cached
+            return
+
+    for attempt in range(MAX_RETRIES + 1):
+        time.sleep(rate_limiter.reserve())
+        try:
+            response = model.generate_content(prompt, generation_config=generation_config, stream=True,
+                                              request_options={"timeout": deadline})
+            chunks = iter(response)
+            first = next(chunks, None)
+            break
+        except _retryable_errors():
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+
+    stats.update(ttft=time.perf_counter() - start, cached=False)
+    logger.info("Gemini stream %s: first token after %.2fs", model.model_name, stats["ttft"])
+    parts = []
+    for chunk in itertools.chain([first] if first is not None else [], chunks):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. a trailing finish_reason) carry nothing to render
+            continue
+        if text:
+            parts.append(text)
+            yield text
+    stats["total"] = time.perf_counter() - start
+    input_tokens, output_tokens = _usage(response)
+    logger.info("Gemini stream %s: %d input / %d output tokens, completed after %.2fs", model.model_name,
+                input_tokens, output_tokens, stats["total"])
+
+    if cache is not None and parts:  # an empty stream is never cached, so the next call asks again
+        cache.put(key, model.model_name, "".join(parts), input_tokens, output_tokens)
@@ -0,0 +1,98 @@
+# genai/embeddings.py
+
+import json
+import os
+import re
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# "auto" uses OpenAI when OPENAI_API_KEY is set and the local hashing backend otherwise
+DEFAULT_PROVIDER = os.getenv("ECOSCRIBE_EMBEDDINGS", "auto")
+META_FILE = "embeddings.json"
+
+_WHITESPACE = re.compile(r"\s+")
+# Odd 64-bit constants for the polynomial rolling hash and the final mix
+_PRIME = np.uint64(1099511628211)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Fully local, CPU-only embeddings: character n-grams are hashed straight
+    into a small signed vector (the hashing trick, which doubles as a random
+    projection of the n-gram space), then sublinear-scaled and L2-normalized.
+    A whole batch is hashed and accumulated with vectorized NumPy, and the
+    output is deterministic across processes, so index and queries always agree.
+    """
+
+    def __init__(self, dim=512, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def _hashes(self, text):
+        text = " " + _WHITESPACE.sub(" ", text.lower()).strip() + " "
+        codes = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        hashes = []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            if len(codes) < n:
+                continue
+            windows = np.lib.stride_tricks.sliding_window_view(codes, n)
+            powers = _PRIME ** np.arange(n - 1, -1, -1, dtype=np.uint64)
+            # uint64 arithmetic wraps, which is exactly the modular hash we want
+            hashes.append((windows * powers).sum(axis=1, dtype=np.uint64) + np.uint64(n))
+        return np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
+    def _embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        per_text = [self._hashes(t) for t in texts]
+        rows = np.repeat(np.arange(len(texts)), [len(h) for h in per_text])
+        mixed = np.concatenate(per_text) * _MIX
+        buckets = ((mixed >> np.uint64(32)) % np.uint64(self.dim)).astype(np.int64)
+        signs = np.where((mixed >> np.uint64(31)) & np.uint64(1), 1.0, -1.0)
+        counts = np.bincount(rows * self.dim + buckets, weights=signs, minlength=len(texts) * self.dim)
+        vectors = counts.reshape(len(texts), self.dim)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+def resolve_provider(provider=None):
+    """Concrete provider name ("openai" or "local") for provider, defaulting to ECOSCRIBE_EMBEDDINGS."""
+    provider = provider or DEFAULT_PROVIDER
+    if provider == "auto":
+        return "openai" if os.getenv("OPENAI_API_KEY") else "local"
+    if provider not in ("openai", "local"):
+        raise ValueError(f"Unknown embeddings provider: {provider}")
+    return provider
+
+
+def get_embeddings(provider=None):
+    """Embeddings client for "openai", "local" or "auto"."""
+    if resolve_provider(provider) == "openai":
+        # Imported here so the local backend works without the OpenAI packages
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings()
+    return HashingEmbeddings()
+
+
+def save_provider(path, provider):
+    """Record which provider built the index so queries are embedded the same way."""
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"provider": provider}, f)
+
+
+def load_provider(path):
+    """Provider recorded for an index; indexes built before this file existed used OpenAI."""
+    try:
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            return json.load(f)["provider"]
+    except FileNotFoundError:
+        return "openai"
@@ -0,0 +1,107 @@
+# genai/llm_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from store.sqlite_base import (COUNTERS_TABLE, DEFAULT_STORE_DIR, SQLiteStore, add_counter, evict_lru,
+                               process_singleton, read_counters)
+
+DEFAULT_CACHE_DIR = DEFAULT_STORE_DIR
+DEFAULT_TTL = int(os.getenv("ECOSCRIBE_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_BYTES = int(os.getenv("ECOSCRIBE_LLM_CACHE_MB", "64")) * 1024 * 1024
+
+
+def make_llm_key(model_name, prompt, generation_config=None):
+    """Cache key: model name + full prompt + generation config."""
+    payload = json.dumps([model_name, prompt, generation_config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache(SQLiteStore):
+    """
+    SQLite-backed cache of Gemini responses shared by every genai module.
+    Entries expire after ttl seconds and the least recently used ones are
+    dropped once the store exceeds max_bytes. Hits are tallied together with
+    the tokens they saved.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS responses ("
+        "key TEXT PRIMARY KEY, model TEXT NOT NULL, text TEXT NOT NULL, "
+        "input_tokens INTEGER NOT NULL, output_tokens INTEGER NOT NULL, "
+        "size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)",
+        COUNTERS_TABLE,
+    )
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path or os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite"))
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached response text, or None if missing or expired."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text, input_tokens + output_tokens FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                add_counter(conn, "hits")
+                add_counter(conn, "tokens_saved", row[1])
+            else:
+                add_counter(conn, "misses")
+        with self._lock:
+            if row:
+                self.hits += 1
+                self.tokens_saved += row[1]
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key, model_name, text, input_tokens=0, output_tokens=0):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, text, input_tokens, output_tokens, len(text.encode("utf-8")), now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            evict_lru(conn, "responses", self.max_bytes)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Hit rate and tokens saved for this process plus lifetime totals."""
+        with self._connect() as conn:
+            totals = read_counters(conn)
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        total_lookups = totals.get("hits", 0) + totals.get("misses", 0)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "total_hit_rate": round(totals.get("hits", 0) / total_lookups, 3) if total_lookups else 0.0,
+            "total_tokens_saved": totals.get("tokens_saved", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+@process_singleton
+def get_llm_cache():
+    """Process-wide LLMCache instance."""
+    return LLMCache()
@@ -0,0 +1,142 @@
+# genai/prompting.py
+
+import logging
+import re
+import unicodedata
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Token budget for the document part of each task's prompt; the model only
+# needs a representative sample for classification, more for summaries
+TASK_BUDGETS = {
+    "summary": 6000,
+    "analysis": 6000,
+    "title": 2000,
+    "classify": 1200,
+    "explain": 1500,
+    "feedback": 6000,
+}
+
+
+
+def _mark_class():
+    """Regex class of the BMP's combining marks (Devanagari matras etc.), which \\w doesn't match."""
+    ranges, start, prev = [], None, None
+    for code in range(0x10000):
+        if unicodedata.category(chr(code))[0] != "M":
+            continue
+        if prev is not None and code == prev + 1:
+            prev = code
+            continue
+        if start is not None:
+            ranges.append((start, prev))
+        start = prev = code
+    ranges.append((start, prev))
+    return "".join(re.escape(chr(a)) + (f"-{re.escape(chr(b))}" if b > a else "") for a, b in ranges)
+
+
+SENTENCE_END = re.compile(r"(?<=[.!?;।])\s+")
+# Letters plus combining marks, so Hindi/Marathi words (consonant + vowel sign) count as words
+WORD = re.compile(rf"(?:[^\W\d_]|[{_mark_class()}]){{3,}}")
+STOPWORDS = frozenset(
+    "the and for that with this from was were are not but have has had which their there they "
+    "his her its all any been being into upon unto shall such than then them these those who whom".split()
+)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), close enough for budgeting without an API call."""
+    return len(text) // 4 + 1
+
+
+def normalize_text(text):
+    """Undo common OCR layout noise: hyphenated line breaks, runs of spaces, stray blank lines."""
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r"([^\w\s])\1{3,}", r"\1", text)  # "-------", "......" rulers and leaders
+    text = "\n".join(line.strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _is_junk(line):
+    """OCR garbage: mostly symbols, or no real word at all."""
+    if not line:
+        return False
+    letters = sum(unicodedata.category(ch)[0] in "LM" for ch in line)
+    return letters / len(line) < 0.5 or not WORD.search(line)
+
+
+def drop_junk_lines(text):
+    return "\n".join(line for line in text.splitlines() if not _is_junk(line))
+
+
+def select_sentences(text, budget):
+    """
+    Extractive pre-selection: keep the highest-scoring sentences (frequent
+    content words, with a bonus for the opening) until budget tokens are used,
+    in their original order. Repeated sentences (running headers etc.) are kept once.
+    """
+    sentences = [s for s in SENTENCE_END.split(text) if s.strip()]
+    freq = Counter(w for w in WORD.findall(text.lower()) if w not in STOPWORDS)
+    top = max(freq.values(), default=1)
+
+    def score(item):
+        index, sentence = item
+        words = [w for w in WORD.findall(sentence.lower()) if w not in STOPWORDS]
+        lead = 1.0 if index < 3 else 0.0
+        return sum(freq[w] for w in words) / top / (len(words) + 5) + lead
+
+    chosen, seen, used = set(), set(), 0
+    for index, sentence in sorted(enumerate(sentences), key=score, reverse=True):
+        key = " ".join(sentence.lower().split())
+        cost = estimate_tokens(sentence)
+        if key not in seen and used + cost <= budget:
+            chosen.add(index)
+            seen.add(key)
+            used += cost
+    if not chosen:
+        # No sentence boundaries to work with (one huge run-on block): keep the opening
+        return text[:budget * 4]
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def compact_text(text, budget):
+    """
+    Cheapest compaction that brings text under budget tokens; text already within budget is untouched.
+    Never empty for a non-empty text: if every line looked like junk, the original's opening is kept.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    original = text
+    for step in (normalize_text, drop_junk_lines):
+        text = step(text)
+        if text.strip() and estimate_tokens(text) <= budget:
+            return text
+    compacted = select_sentences(text, budget) if text.strip() else ""
+    return compacted if compacted.strip() else original[:budget * 4]
+
+
+def window_around(text, focus, budget):
+    """The budget-sized stretch of text centred on the first occurrence of focus (or None if absent)."""
+    position = text.lower().find(focus.lower()) if focus else -1
+    if position < 0:
+        return None
+    half = budget * 4 // 2
+    start = max(0, position - half)
+    return text[start:start + budget * 4]
+
+
+def fit_document(text, task, focus=None):
+    """
+    Document text for task's prompt, compacted to TASK_BUDGETS[task].
+    With focus (e.g. a clicked word), an over-budget text is cut to the window around it instead.
+    """
+    budget = TASK_BUDGETS[task]
+    compacted = compact_text(text, budget)
+    if compacted is not text and focus:
+        compacted = window_around(text, focus, budget) or compacted
+    if compacted is not text:
+        logger.info("Prompt %s: compacted document from ~%d to ~%d tokens", task,
+                    estimate_tokens(text), estimate_tokens(compacted))
+    return compacted
@@ -1,27 +1,15 @@
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-from langchain_openai import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-from langchain.docstore.document import Document
+import asyncio
+import time
+from genai.client import generate_text, generate_stream, agenerate_text, agenerate_many, get_model, run_async
+from genai.chunking import split_text, split_text_with_overlaps, stitch_chunks
 
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("🚨 GOOGLE_API_KEY is not set in the .env file")
-
-genai.configure(api_key=GOOGLE_API_KEY)
-
-# Initialize Gemini model (use 1.5 Pro or Flash depending on availability)
-gemini_model = genai.GenerativeModel("models/gemini-1.5-flash")
+# Gemini model (use 1.5 Pro or Flash depending on availability); created on first use by get_model
+RESTORE_MODEL = "models/gemini-1.5-flash"
 
 
 # 🔁 Simple Restoration (No RAG)
-def restore_text_with_gemini(damaged_text, style="simple"):
-    prompt = f"""
+def _restoration_prompt(damaged_text, style):
+    return f"""
 You are an expert document restoration assistant.
 
 Restore the following damaged or incomplete text in a {style} writing style:
@@ -33,25 +21,46 @@ Damaged Text:
 
 Provide the most accurate and readable restoration.
 """
-    response = gemini_model.generate_content(prompt)
-    return response.text.strip()
+
+
+def restore_text_with_gemini(damaged_text, style="simple"):
+    return generate_text(get_model(RESTORE_MODEL), _restoration_prompt(damaged_text, style)).strip()
+
+
+def restore_text_with_gemini_stream(damaged_text, style="simple", stats=None):
+    """Yields the restoration as it is generated (see genai.client.generate_stream for stats)."""
+    return generate_stream(get_model(RESTORE_MODEL), _restoration_prompt(damaged_text, style), stats=stats)
 
 
 # 📚 RAG-based Retrieval
-def retrieve_context(query_text):
+MAX_QUERIES = 16
+CONTEXT_TOKEN_BUDGET = 1000
+
+
+def retrieve_document_context(damaged_text, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Context for the whole document rather than its first 300 characters: the
+    text is cut into ~500-character queries (evenly sampled down to MAX_QUERIES)
+    that are searched as one batch and merged with MMR under token_budget.
+    """
+    queries = split_text(damaged_text, max_chars=500, overlap_chars=0)
+    if len(queries) > MAX_QUERIES:
+        step = len(queries) / MAX_QUERIES
+        queries = [queries[int(i * step)] for i in range(MAX_QUERIES)]
     try:
-        vectorstore = FAISS.load_local("rag_vector_db", OpenAIEmbeddings())
-        results = vectorstore.similarity_search(query_text, k=2)
+        # Imported here: FAISS and LangChain are only needed once RAG is actually used
+        from genai.retriever import get_retriever
+
+        # Warm, process-wide index: loaded once and hot-reloaded when rag_vector_db changes
+        results = get_retriever().multi_query_search(queries, token_budget=token_budget)
         return "\n\n".join([doc.page_content for doc in results])
     except Exception as e:
         return "Context retrieval failed due to missing vector DB. Proceeding without external context."
 
 
 # 🧠 RAG-Aware Restoration
-def restore_text_with_rag(damaged_text, style="simple"):
-    context = retrieve_context(damaged_text[:300])  # Use first 300 chars for query
-
-    prompt = f"""
+def _rag_prompt(damaged_text, style, context):
+    return f"""
 You are an AI restoration expert trained in restoring {style} style texts.
 
 Use the context below to reconstruct the missing parts of the damaged text as faithfully and factually as possible.
@@ -68,5 +77,63 @@ Damaged Text:
 
 Reconstruct the text while preserving its original meaning and tone.
 """
-    response = gemini_model.generate_content(prompt)
-    return response.text.strip()
+
+
+def restore_text_with_rag(damaged_text, style="simple"):
+    context = retrieve_document_context(damaged_text)
+    return generate_text(get_model(RESTORE_MODEL), _rag_prompt(damaged_text, style, context)).strip()
+
+
+def restore_text_with_rag_stream(damaged_text, style="simple", stats=None):
+    context = retrieve_document_context(damaged_text)
+    return generate_stream(get_model(RESTORE_MODEL), _rag_prompt(damaged_text, style, context), stats=stats)
+
+
+# 📦 Batch Restoration
+async def arestore_many(damaged_texts, style="simple", use_rag=False):
+    """Restore many documents concurrently; results in input order, failures as exception objects."""
+    if use_rag:
+        contexts = await asyncio.gather(*(asyncio.to_thread(retrieve_document_context, text) for text in damaged_texts))
+        prompts = [_rag_prompt(text, style, context) for text, context in zip(damaged_texts, contexts)]
+    else:
+        prompts = [_restoration_prompt(text, style) for text in damaged_texts]
+    results = await agenerate_many(get_model(RESTORE_MODEL), prompts)
+    return [r if isinstance(r, Exception) else r.strip() for r in results]
+
+
+def restore_many(damaged_texts, style="simple", use_rag=False):
+    return run_async(arestore_many(damaged_texts, style=style, use_rag=use_rag))
+
+
+# ✂️ Chunked Map-Reduce Restoration
+async def arestore_text_chunked(damaged_text, style="simple", use_rag=False, max_chars=3000, overlap_chars=300):
+    """
+    Restore a long document as overlapping chunks restored concurrently (with
+    per-chunk retrieval when use_rag), then stitched back together in order.
+    Returns (restored_text, report); report has one entry per chunk with its
+    size, latency in seconds and error, if any. A failed chunk keeps its damaged text.
+    """
+    chunks, overlaps = split_text_with_overlaps(damaged_text, max_chars=max_chars, overlap_chars=overlap_chars)
+
+    async def restore_chunk(index, chunk):
+        start = time.perf_counter()
+        try:
+            if use_rag:
+                context = await asyncio.to_thread(retrieve_document_context, chunk)
+                prompt = _rag_prompt(chunk, style, context)
+            else:
+                prompt = _restoration_prompt(chunk, style)
+            restored = (await agenerate_text(get_model(RESTORE_MODEL), prompt)).strip()
+            error = None
+        except Exception as e:
+            restored, error = chunk, f"{type(e).__name__}: {e}"
+        return restored, {"chunk": index, "chars": len(chunk), "latency": round(time.perf_counter() - start, 2),
+                          "error": error}
+
+    results = await asyncio.gather(*(restore_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+    return stitch_chunks([restored for restored, _ in results], overlaps), [report for _, report in results]
+
+
+def restore_text_chunked(damaged_text, style="simple", use_rag=False, max_chars=3000, overlap_chars=300):
+    return run_async(arestore_text_chunked(damaged_text, style=style, use_rag=use_rag,
+                                             max_chars=max_chars, overlap_chars=overlap_chars))
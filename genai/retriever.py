@@ -0,0 +1,228 @@
+# genai/retriever.py
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from genai.bm25 import BM25_DIR, BM25Index
+from genai.embeddings import META_FILE, get_embeddings, load_provider
+from genai.prompting import estimate_tokens
+
+VECTOR_DB_PATH = "rag_vector_db"
+INDEX_FILES = ("index.faiss", "index.pkl")
+RRF_K = 60
+
+
+def _rrf(rankings):
+    """Reciprocal-rank fusion of ranked id lists: {id: sum of 1 / (RRF_K + rank)}."""
+    fused = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (RRF_K + rank)
+    return fused
+
+
+def _mmr(relevance, similarity, costs, budget, lambda_mult):
+    """
+    Maximal marginal relevance: repeatedly pick the candidate with the best
+    lambda_mult * relevance - (1 - lambda_mult) * (max similarity to the picks so far),
+    skipping any whose cost no longer fits budget. Returns candidate indices in pick order.
+    """
+    selected, remaining = [], list(range(len(relevance)))
+    while remaining:
+        redundancy = similarity[np.ix_(remaining, selected)].max(axis=1) if selected else 0.0
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = remaining.pop(int(np.argmax(scores)))
+        if costs[best] <= budget:
+            selected.append(best)
+            budget -= costs[best]
+    return selected
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class CachedEmbeddings(Embeddings):
+    """LRU cache around an embeddings client so identical query strings are embedded once."""
+
+    def __init__(self, base, max_queries=1024):
+        self.base = base
+        self.max_queries = max_queries
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_query(self, text):
+        with self._lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                self.hits += 1
+                return self._queries[text]
+        vector = self.base.embed_query(text)
+        with self._lock:
+            self.misses += 1
+            self._queries[text] = vector
+            if len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+
+class VectorRetriever:
+    """
+    Long-lived FAISS store shared by every session in the process.
+    The index is memory-mapped where the index type allows it and is reloaded
+    when the files under path change on disk (checked at most every check_interval seconds).
+    Unless embeddings is given, queries are embedded with the provider recorded by the builder.
+    When the builder also wrote a BM25 index, searches fuse both rankings with RRF.
+    """
+
+    def __init__(self, path=VECTOR_DB_PATH, embeddings=None, mmap=True, check_interval=2.0):
+        self.path = path
+        self.embeddings = embeddings
+        self.provider = None
+        self.mmap = mmap
+        self.check_interval = check_interval
+        self.store = None
+        self.bm25 = None
+        self._positions = {}
+        self._signature = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _files_signature(self):
+        # Every file _load() reads, so a rebuild that only rewrote BM25 or the provider record still reloads
+        bm25_dir = os.path.join(self.path, BM25_DIR)
+        optional = [os.path.join(self.path, META_FILE)]
+        if os.path.isdir(bm25_dir):
+            optional += [os.path.join(bm25_dir, name) for name in sorted(os.listdir(bm25_dir))]
+        signature = [(os.stat(f).st_mtime_ns, os.stat(f).st_size)
+                     for f in (os.path.join(self.path, name) for name in INDEX_FILES)]
+        for f in optional:
+            try:
+                signature.append((f, os.stat(f).st_mtime_ns, os.stat(f).st_size))
+            except FileNotFoundError:
+                signature.append((f, None))
+        return tuple(signature)
+
+    def _read_index(self):
+        index_path = os.path.join(self.path, "index.faiss")
+        if self.mmap:
+            try:
+                return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                pass  # index type without mmap support; read it into memory instead
+        return faiss.read_index(index_path)
+
+    def _load(self):
+        with open(os.path.join(self.path, "index.pkl"), "rb") as f:
+            # Written by our own vector_store_builder via FAISS.save_local
+            docstore, index_to_docstore_id = pickle.load(f)
+        provider = load_provider(self.path)
+        if self.embeddings is None or (self.provider is not None and provider != self.provider):
+            # Vectors from one provider are meaningless to another, so follow the index on rebuilds
+            self.embeddings = CachedEmbeddings(get_embeddings(provider))
+            self.provider = provider
+        store = FAISS(embedding_function=self.embeddings, index=self._read_index(),
+                      docstore=docstore, index_to_docstore_id=index_to_docstore_id)
+        positions = {doc_id: i for i, doc_id in index_to_docstore_id.items()}
+        return store, BM25Index.load(self.path), positions
+
+    def get_store(self):
+        """Current FAISS store, loading it on first use and hot-reloading it after a rebuild."""
+        now = time.monotonic()
+        if self.store is not None and now - self._checked < self.check_interval:
+            return self.store
+        with self._lock:
+            self._checked = now
+            signature = self._files_signature()
+            if self.store is None or signature != self._signature:
+                # Build the new store fully before swapping so readers never see a half-loaded index
+                store, self.bm25, self._positions = self._load()
+                self.store = store
+                self._signature = signature
+            return self.store
+
+    def similarity_search(self, query, k=2):
+        return self.get_store().similarity_search(query, k=k)
+
+    def _vector_ranking(self, store, vectors, k):
+        _, indices = store.index.search(np.asarray(vectors, dtype=np.float32), k)
+        return [[int(i) for i in row if i >= 0] for row in indices]
+
+    def _bm25_ranking(self, query, k):
+        if self.bm25 is None:
+            return []
+        return [self._positions[key] for key, _ in self.bm25.search(query, k) if key in self._positions]
+
+    def search_positions(self, query, k=2, mode="hybrid", fetch_k=10):
+        """FAISS positions of the top-k chunks for query; mode is "hybrid", "vector" or "bm25"."""
+        store = self.get_store()
+        rankings = []
+        if mode in ("hybrid", "vector"):
+            rankings += self._vector_ranking(store, [self.embeddings.embed_query(query)], fetch_k)
+        if mode in ("hybrid", "bm25"):
+            rankings.append(self._bm25_ranking(query, fetch_k))
+        fused = _rrf(rankings)
+        return sorted(fused, key=fused.get, reverse=True)[:k]
+
+    def multi_query_search(self, queries, k_per_query=4, token_budget=1000, lambda_mult=0.6):
+        """
+        Retrieve context for a whole document: each query is embedded with
+        embed_query (so repeated queries hit the query cache), then all are
+        searched in one FAISS call (plus BM25 per query when available),
+        then the pooled candidates are picked by maximal marginal relevance
+        (relevance = RRF score across all rankings, minus redundancy with what is
+        already picked) until token_budget is spent.
+        Returns the picked documents in selection order.
+        """
+        if not queries:
+            return []
+        store = self.get_store()
+        query_vectors = np.asarray([self.embeddings.embed_query(query) for query in queries], dtype=np.float32)
+        rankings = self._vector_ranking(store, query_vectors, k_per_query)
+        rankings += [self._bm25_ranking(query, k_per_query) for query in queries]
+        fused = _rrf(rankings)
+        candidates = sorted(fused)
+        if not candidates:
+            return []
+
+        try:
+            doc_vectors = np.vstack([store.index.reconstruct(i) for i in candidates])
+        except RuntimeError:
+            # Index types that can't reconstruct vectors: embed the candidate texts instead
+            texts = [store.docstore.search(store.index_to_docstore_id[i]).page_content for i in candidates]
+            doc_vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        doc_vectors = _normalize_rows(doc_vectors)
+        relevance = np.array([fused[i] for i in candidates])
+        relevance /= relevance.max()
+        similarity = doc_vectors @ doc_vectors.T
+
+        docs = [store.docstore.search(store.index_to_docstore_id[i]) for i in candidates]
+        costs = [estimate_tokens(doc.page_content) for doc in docs]
+        return [docs[i] for i in _mmr(relevance, similarity, costs, token_budget, lambda_mult)]
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever():
+    """Process-wide VectorRetriever, created on first use."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = VectorRetriever()
+        return _retriever
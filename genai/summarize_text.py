@@ -1,18 +1,13 @@
 # genai/summarize_text.py
 
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-load_dotenv()
+from genai.client import generate_text, generate_stream, generate_many, get_model
+from genai.prompting import fit_document
 
-# Configure Gemini with your API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+API_ERROR = "⚠️ Gemini API Error"  # prefix of the text the single-document calls return instead of raising
 
-# Use the Gemini Pro model (more stable than Flash)
-model = genai.GenerativeModel(model_name="models/gemini-1.5-flash-latest")
-
-def summarize_and_extract(text):
-    prompt = f"""
+def _summary_prompt(text):
+    text = fit_document(text, "summary")
+    return f"""
 You are a smart AI document assistant.
 
 Your task is to:
@@ -38,8 +33,25 @@ Metadata:
 - Keywords: <Important keywords, comma-separated>
 - Domain: <Choose one: Historical, Legal, Academic, General>
 """
+
+
+def summarize_and_extract(text):
+    # Transient/quota errors are retried inside generate_text; only a final failure lands here
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return generate_text(get_model(), _summary_prompt(text)).strip()
     except Exception as e:
-        return f"⚠️ Gemini API Error: {str(e)}"
+        return f"{API_ERROR}: {str(e)}"
+
+
+def summarize_and_extract_stream(text, stats=None):
+    """Yields the summary as it is generated; a final failure is yielded as the same error string."""
+    try:
+        yield from generate_stream(get_model(), _summary_prompt(text), stats=stats)
+    except Exception as e:
+        yield f"{API_ERROR}: {str(e)}"
+
+
+def summarize_many(texts):
+    """Summarize many documents concurrently within the shared rate limit; failed items come back as exceptions."""
+    results = generate_many(get_model(), [_summary_prompt(text) for text in texts])
+    return [r if isinstance(r, Exception) else r.strip() for r in results]
@@ -1,11 +1,9 @@
-import google.generativeai as genai
-import os
+from genai.client import generate_text, generate_many, get_model
+from genai.prompting import fit_document
 
-# Load API key from environment
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))  # Set this in .env file
-
-def extract_title_and_keywords(text):
-    prompt = f"""
+def _title_keyword_prompt(text):
+    text = fit_document(text, "title")
+    return f"""
     You are an AI document assistant.
 
     Analyze the following document and return:
@@ -20,11 +18,9 @@ def extract_title_and_keywords(text):
     Keywords: <comma-separated list>
     """
 
-    model = genai.GenerativeModel(model_name="models/gemini-1.5-flash-latest")
-    response = model.generate_content(prompt)
 
-    output = response.text.strip()
-    lines = output.splitlines()
+def _parse_title_and_keywords(output):
+    lines = output.strip().splitlines()
 
     title = ""
     keywords = []
@@ -36,3 +32,13 @@ def extract_title_and_keywords(text):
             keywords = [kw.strip() for kw in line.split(":", 1)[1].split(',')]
 
     return title, keywords
+
+
+def extract_title_and_keywords(text):
+    return _parse_title_and_keywords(generate_text(get_model(), _title_keyword_prompt(text)))
+
+
+def extract_many(texts):
+    """Extract (title, keywords) for many documents concurrently; failed items come back as exceptions."""
+    results = generate_many(get_model(), [_title_keyword_prompt(text) for text in texts])
+    return [r if isinstance(r, Exception) else _parse_title_and_keywords(r) for r in results]
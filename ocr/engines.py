@@ -0,0 +1,120 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import pytesseract
+from PIL import Image
+from pytesseract import Output
+
+# "auto" prefers the in-process tesserocr engine and falls back to pytesseract
+DEFAULT_ENGINE = os.getenv("ECOSCRIBE_OCR_ENGINE", "auto")
+
+
+class PytesseractEngine:
+    """Spawns a tesseract process per call (temp image file + TSV on stdout)."""
+
+    name = "pytesseract"
+
+    def image_to_data(self, image, psm=3, lang="eng", timeout=0):
+        return pytesseract.image_to_data(image, config=f"--psm {psm}", lang=lang,
+                                         output_type=Output.DICT, timeout=timeout)
+
+
+class TesserocrEngine:
+    """
+    Long-lived libtesseract handles via tesserocr, pooled per language and
+    checked out for one call at a time: traineddata is loaded once per handle
+    and handles outlive the (short-lived) threads that use them. Images are
+    handed over as raw pixel buffers with no temp files or subprocesses.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._idle = {}  # lang -> handles not in use
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _api(self, lang):
+        with self._lock:
+            idle = self._idle.setdefault(lang, [])
+            api = idle.pop() if idle else None
+        if api is None:
+            api = self._tesserocr.PyTessBaseAPI(lang=lang)
+        try:
+            yield api
+        finally:
+            api.Clear()
+            with self._lock:
+                self._idle[lang].append(api)
+
+    def image_to_data(self, image, psm=3, lang="eng", timeout=0):
+        with self._api(lang) as api:
+            return self._image_to_data(api, image, psm, timeout)
+
+    def _image_to_data(self, api, image, psm, timeout):
+        tesserocr = self._tesserocr
+        api.SetPageSegMode(psm)
+        if isinstance(image, Image.Image):
+            api.SetImage(image)
+        else:
+            height, width = image.shape[:2]
+            channels = 1 if image.ndim == 2 else image.shape[2]
+            api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        if not api.Recognize(timeout=int(timeout * 1000)):
+            raise RuntimeError("Tesseract recognition failed or timed out")
+
+        # Mirror the pytesseract image_to_data dict (word rows only) so callers don't care which engine ran
+        keys = ["level", "page_num", "block_num", "par_num", "line_num", "word_num",
+                "left", "top", "width", "height", "conf", "text"]
+        data = {key: [] for key in keys}
+        block = par = line = word = 0
+        level = tesserocr.RIL.WORD
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+        for item in tesserocr.iterate_level(iterator, level):
+            if item.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                block, par, line = block + 1, 0, 0
+            if item.IsAtBeginningOf(tesserocr.RIL.PARA):
+                par, line = par + 1, 0
+            if item.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+            box = item.BoundingBox(level)
+            if box is None:
+                continue
+            x1, y1, x2, y2 = box
+            values = [5, 1, block, par, line, word, x1, y1, x2 - x1, y2 - y1,
+                      item.Confidence(level), item.GetUTF8Text(level)]
+            for key, value in zip(keys, values):
+                data[key].append(value)
+        return data
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name=None):
+    """
+    Process-wide OCR engine by name: "tesserocr", "pytesseract" or "auto".
+    "auto" uses tesserocr when it is installed and pytesseract otherwise.
+    """
+    name = name or DEFAULT_ENGINE
+    with _engines_lock:
+        if name not in _engines:
+            if name == "pytesseract":
+                _engines[name] = PytesseractEngine()
+            elif name == "tesserocr":
+                _engines[name] = TesserocrEngine()
+            elif name == "auto":
+                try:
+                    _engines[name] = TesserocrEngine()
+                except ImportError:
+                    _engines[name] = PytesseractEngine()
+            else:
+                raise ValueError(f"Unknown OCR engine: {name}")
+        return _engines[name]
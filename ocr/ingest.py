@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageSequence
+
+PDF_EXTENSIONS = (".pdf",)
+TIFF_EXTENSIONS = (".tif", ".tiff")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg") + TIFF_EXTENSIONS
+SUPPORTED_EXTENSIONS = IMAGE_EXTENSIONS + PDF_EXTENSIONS
+
+# Multi-page sources are addressed as "<path>#page=<index>" (0-based)
+PAGE_MARKER = "#page="
+DEFAULT_RENDER_DPI = 300
+MAX_OPEN_FRAME_FILES = 4  # multi-frame images kept open per process by open_page
+
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+_frame_files = OrderedDict()  # path -> open multi-frame image, most recently used last
+_frame_files_lock = threading.Lock()
+
+
+def page_ref(path, index):
+    return f"{path}{PAGE_MARKER}{index}"
+
+
+def split_page_ref(ref):
+    """'doc.pdf#page=3' -> ('doc.pdf', 3); plain paths -> (path, None)."""
+    path, marker, index = ref.rpartition(PAGE_MARKER)
+    if marker and index.isdigit():
+        return path, int(index)
+    return ref, None
+
+
+def is_pdf(path):
+    return path.lower().endswith(PDF_EXTENSIONS)
+
+
+def _open_pdf(path):
+    # Optional dependency: only needed once a PDF is actually uploaded
+    import pypdfium2 as pdfium
+    return pdfium.PdfDocument(path)
+
+
+def count_pages(path):
+    """Number of pages without rasterizing anything."""
+    if is_pdf(path):
+        pdf = _open_pdf(path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    with Image.open(path) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def iter_page_refs(path):
+    """Addressable page references for a file: the path itself for single images, one ref per page otherwise."""
+    pages = count_pages(path)
+    if pages == 1 and not is_pdf(path):
+        yield path
+        return
+    for index in range(pages):
+        yield page_ref(path, index)
+
+
+def _render_pdf_page(pdf, index, dpi):
+    page = pdf[index]
+    try:
+        image = page.render(scale=dpi / 72).to_pil()
+    finally:
+        page.close()
+    image.info["dpi"] = (dpi, dpi)
+    return image
+
+
+def open_page(ref, dpi=DEFAULT_RENDER_DPI):
+    """Decode a single page (plain image path or page ref) into a standalone PIL image."""
+    path, index = split_page_ref(ref)
+    if is_pdf(path):
+        pdf = _open_pdf(path)
+        try:
+            return _render_pdf_page(pdf, index or 0, dpi)
+        finally:
+            pdf.close()
+    if not index:
+        with Image.open(path) as image:
+            # copy() decodes just the current frame and detaches it from the open file
+            return image.copy()
+    # Seeking a TIFF walks its frame directory from the start; keeping the file open lets PIL
+    # reuse the frame offsets it already found, so page after page stays linear overall
+    with _frame_files_lock:
+        image = _frame_files.pop(path, None) or Image.open(path)
+        _frame_files[path] = image
+        while len(_frame_files) > MAX_OPEN_FRAME_FILES:
+            _frame_files.popitem(last=False)[1].close()
+        image.seek(index)
+        return image.copy()
+
+
+def iter_pages(path, dpi=DEFAULT_RENDER_DPI):
+    """
+    Lazily yield (ref, PIL image) for every page of an image, multi-frame TIFF or PDF,
+    opening the file once and reading it front to back. Only the current page is decoded,
+    so memory stays flat regardless of page count. Refs match iter_page_refs.
+    """
+    if is_pdf(path):
+        pdf = _open_pdf(path)
+        try:
+            for index in range(len(pdf)):
+                yield page_ref(path, index), _render_pdf_page(pdf, index, dpi)
+        finally:
+            pdf.close()
+        return
+    with Image.open(path) as image:
+        frames = getattr(image, "n_frames", 1)
+        for index, frame in enumerate(ImageSequence.Iterator(image)):
+            yield (page_ref(path, index) if frames > 1 else path), frame.copy()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Streaming sha256 of a file, memoized on (path, size, mtime) so large PDFs are hashed once per change."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    with _fingerprint_lock:
+        _fingerprints[memo_key] = digest.hexdigest()
+    return _fingerprints[memo_key]
+
+
+def page_fingerprint(ref):
+    """Content identity of a single page: file hash plus page index."""
+    path, index = split_page_ref(ref)
+    return f"{file_digest(path)}:{index or 0}"
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from store.sqlite_base import (COUNTERS_TABLE, DEFAULT_STORE_DIR, SQLiteStore, add_counter, evict_lru,
+                               process_singleton, read_counters)
+
+DEFAULT_CACHE_DIR = DEFAULT_STORE_DIR
+DEFAULT_MAX_BYTES = int(os.getenv("ECOSCRIBE_OCR_CACHE_MB", "256")) * 1024 * 1024
+
+
+def make_cache_key(image_bytes, **params):
+    """Content address for an OCR result: image bytes plus every parameter that changes the output."""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class OCRCache(SQLiteStore):
+    """
+    Persistent OCR result cache backed by SQLite.
+    Entries are JSON blobs evicted least-recently-used once the total size exceeds max_bytes.
+    Safe to share between Streamlit sessions and worker processes (see SQLiteStore).
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)",
+        COUNTERS_TABLE,
+    )
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path or os.path.join(DEFAULT_CACHE_DIR, "ocr_cache.sqlite"))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            add_counter(conn, "hits" if row else "misses")
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, value):
+        blob = json.dumps(value)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries(key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            evict_lru(conn, "entries", self.max_bytes)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self):
+        """Hit/miss counters for this process plus lifetime totals stored alongside the cache."""
+        with self._connect() as conn:
+            totals = read_counters(conn)
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+@process_singleton
+def get_ocr_cache():
+    """Process-wide OCRCache instance."""
+    return OCRCache()
@@ -1,63 +1,321 @@
 import cv2
-import pytesseract
+import os
+import time
 from PIL import Image
 import numpy as np
 import random
-from pytesseract import Output
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from ocr.ocr_cache import get_ocr_cache, make_cache_key
+from ocr.preprocess import DEFAULT_PIPELINE
+from ocr.ingest import iter_pages, open_page, page_fingerprint, split_page_ref
+from ocr.engines import get_engine
+from ocr.layout import block_psm, segment_blocks
 
+# Bump whenever preprocessing or result parsing changes so cached OCR output is invalidated
+PREPROCESS_VERSION = 2
 
-def preprocess_image(image_path, crop_box=None):
-    """Preprocess the image with optional cropping"""
-    image = cv2.imread(image_path)
+
+def load_image(image_path, crop_box=None):
+    """
+    Open an image as a BGR array with optional (x1, y1, x2, y2) cropping; also returns the full size and DPI.
+    image_path may be a file path, a page ref ("scan.pdf#page=3") or an already decoded PIL image.
+    """
+    image = image_path if isinstance(image_path, Image.Image) else open_page(image_path)
+    full_size = image.size
+    dpi = image.info.get("dpi", (None,))[0]
 
     if crop_box:
-        x1, y1, x2, y2 = crop_box
-        image = image[y1:y2, x1:x2]
+        image = image.crop(crop_box)
+
+    image_cv = cv2.cvtColor(np.array(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    return image_cv, full_size, dpi
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    denoised = cv2.fastNlMeansDenoising(gray, h=10)
-    _, thresholded = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+def preprocess_image(image_path, crop_box=None, pipeline=None):
+    """Preprocess the image with optional cropping"""
+    image, _, dpi = load_image(image_path, crop_box)
+    thresholded, _ = (pipeline or DEFAULT_PIPELINE).run(image, dpi=dpi)
     return thresholded
 
 
-def perform_ocr(image_path, psm=3, lang="eng", crop_box=None):
+def parse_tesseract_data(data):
     """
-    Perform OCR with preprocessing, confidence scoring, and heuristic accuracy estimation.
-    crop_box: (x1, y1, x2, y2) format
+    Rebuild text plus word/line structure from a pytesseract image_to_data dict.
+    Lines are joined with newlines and paragraphs/blocks separated by a blank line,
+    matching the layout image_to_string produces.
     """
-    image = Image.open(image_path)
-    width, height = image.size
-    total_pixels = width * height
+    words, lines = [], []
+    line_index = {}
+    for i, word_text in enumerate(data["text"]):
+        word_text = str(word_text).strip()
+        if int(data["level"][i]) != 5 or not word_text:
+            continue
+        line_key = (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+        box = [int(data["left"][i]), int(data["top"][i]), int(data["width"][i]), int(data["height"][i])]
+        if line_key not in line_index:
+            line_index[line_key] = len(lines)
+            lines.append({"block": line_key[0], "par": line_key[1], "box": list(box), "words": []})
+        line = lines[line_index[line_key]]
+        x1, y1 = min(line["box"][0], box[0]), min(line["box"][1], box[1])
+        x2 = max(line["box"][0] + line["box"][2], box[0] + box[2])
+        y2 = max(line["box"][1] + line["box"][3], box[1] + box[3])
+        line["box"] = [x1, y1, x2 - x1, y2 - y1]
+        line["words"].append(len(words))
+        words.append({"text": word_text, "conf": round(float(data["conf"][i]), 2), "box": box, "line": line_index[line_key]})
+
+    parts = []
+    previous = None
+    for line in lines:
+        line["text"] = " ".join(words[w]["text"] for w in line["words"])
+        if previous is not None:
+            parts.append("\n\n" if (line["block"], line["par"]) != previous else "\n")
+        parts.append(line["text"])
+        previous = (line["block"], line["par"])
+
+    return "".join(parts), words, lines
 
-    # Optional Crop
-    if crop_box:
-        image = image.crop(crop_box)
 
-    image_cv = np.array(image)
-    image_cv = cv2.cvtColor(image_cv, cv2.COLOR_RGB2BGR)
+def ocr_cache_key(image_path, psm=3, lang="eng", crop_box=None, pipeline=None, engine=None, layout=False):
+    """Cache key for a page: hash of the page content plus crop/psm/lang and preprocessing version."""
+    if isinstance(image_path, Image.Image):
+        content = image_path.tobytes() + f"{image_path.mode}{image_path.size}".encode()
+    else:
+        content = page_fingerprint(image_path).encode()
+    return make_cache_key(content, crop_box=list(crop_box) if crop_box else None,
+                          psm=psm, lang=lang, version=PREPROCESS_VERSION,
+                          preprocess=(pipeline or DEFAULT_PIPELINE).signature, engine=get_engine(engine).name,
+                          layout=bool(layout))
+
+
+def _ocr_blocks(processed, blocks, lang, engine, timeout, max_workers):
+    """
+    OCR each layout block concurrently with a block-appropriate PSM and
+    reassemble words/lines in reading order, with boxes in page coordinates.
+    Threads are enough here: Tesseract runs outside the GIL in both engines.
+    """
+    pad = 10
+
+    def run(block):
+        x, y, w, h = block
+        crop = cv2.copyMakeBorder(processed[y:y + h, x:x + w], pad, pad, pad, pad,
+                                  cv2.BORDER_CONSTANT, value=255)
+        data = get_engine(engine).image_to_data(crop, psm=block_psm(processed, block), lang=lang, timeout=timeout)
+        return parse_tesseract_data(data)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        parsed = list(pool.map(run, blocks))
+
+    texts, words, lines = [], [], []
+    for block_num, ((x, y, _, _), (text, block_words, block_lines)) in enumerate(zip(blocks, parsed), start=1):
+        if not text.strip():
+            continue
+        texts.append(text)
+        for word in block_words:
+            word["box"] = [word["box"][0] + x - pad, word["box"][1] + y - pad, word["box"][2], word["box"][3]]
+            word["line"] += len(lines)
+        for line in block_lines:
+            line["box"] = [line["box"][0] + x - pad, line["box"][1] + y - pad, line["box"][2], line["box"][3]]
+            line["words"] = [i + len(words) for i in line["words"]]
+            line["block"] = block_num
+        words.extend(block_words)
+        lines.extend(block_lines)
+    return "\n\n".join(texts), words, lines
+
+
+def perform_ocr_detailed(image_path, psm=3, lang="eng", crop_box=None, timeout=0, use_cache=True, pipeline=None,
+                         engine=None, layout=False, layout_workers=None):
+    """
+    Single-pass OCR: one image_to_data call yields text, word boxes, real
+    per-word confidences and line grouping.
+    Returns {"text", "accuracy", "words", "lines", "timings"}; word boxes are
+    [left, top, width, height] in (cropped) source-image pixels.
+    Results are served from / written to the on-disk OCR cache unless use_cache is False.
+    pipeline: ocr.preprocess.PreprocessPipeline, defaults to DEFAULT_PIPELINE
+    engine: "tesserocr", "pytesseract" or "auto" (see ocr.engines.get_engine)
+    layout: segment the page into text blocks/columns and OCR them concurrently
+    (psm then only applies when the page has a single block)
+    """
+    pipeline = pipeline or DEFAULT_PIPELINE
+    if use_cache:
+        cache = get_ocr_cache()
+        key = ocr_cache_key(image_path, psm=psm, lang=lang, crop_box=crop_box, pipeline=pipeline, engine=engine,
+                            layout=layout)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = perform_ocr_detailed(image_path, psm=psm, lang=lang, crop_box=crop_box,
+                                      timeout=timeout, use_cache=False, pipeline=pipeline, engine=engine,
+                                      layout=layout, layout_workers=layout_workers)
+        cache.put(key, result)
+        return result
+
+    image_cv, (width, height), dpi = load_image(image_path, crop_box)
+    total_pixels = width * height
 
     # Preprocessing
-    gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
-    denoised = cv2.fastNlMeansDenoising(gray, h=10)
-    _, processed = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    processed, context = pipeline.run(image_cv, dpi=dpi)
+
+    blocks = []
+    if layout:
+        start = time.perf_counter()
+        blocks = segment_blocks(processed)
+        context["timings"]["layout"] = round((time.perf_counter() - start) * 1000, 2)
 
-    config = f'--psm {psm}'
-    text = pytesseract.image_to_string(processed, config=config, lang=lang)
+    start = time.perf_counter()
+    if len(blocks) > 1:
+        text, words, lines = _ocr_blocks(processed, blocks, lang, engine, timeout,
+                                         layout_workers or min(4, os.cpu_count() or 1))
+    else:
+        data = get_engine(engine).image_to_data(processed, psm=psm, lang=lang, timeout=timeout)
+        text, words, lines = parse_tesseract_data(data)
+    context["timings"]["tesseract"] = round((time.perf_counter() - start) * 1000, 2)
+
+    # Map boxes back to source pixels if the pipeline downscaled the page
+    if context["scale"] != 1.0:
+        for item in words + lines:
+            item["box"] = [int(round(v / context["scale"])) for v in item["box"]]
+        blocks = [[int(round(v / context["scale"])) for v in block] for block in blocks]
 
     # Confidence Scores
-    try:
-        data = pytesseract.image_to_data(processed, config=config, lang=lang, output_type=Output.DICT)
-        confidences = [int(conf) for conf in data['conf'] if conf != '-1']
-        avg_conf = sum(confidences) / len(confidences) if confidences else 0
-    except:
-        avg_conf = 0  # fallback
+    confidences = [w["conf"] for w in words if w["conf"] >= 0]
+    avg_conf = sum(confidences) / len(confidences) if confidences else 0
 
     # Heuristic OCR quality estimation
     text_length = len(text.strip())
     density_score = (text_length / (total_pixels / 1000)) * 1.5 if total_pixels else 0
     estimated_accuracy = min((0.6 * avg_conf + 0.4 * density_score), 100)
 
-    return text, round(estimated_accuracy, 2)
+    return {"text": text, "accuracy": round(estimated_accuracy, 2), "words": words, "lines": lines,
+            "blocks": blocks, "timings": context["timings"]}
+
+
+def perform_ocr(image_path, psm=3, lang="eng", crop_box=None, timeout=0, use_cache=True, pipeline=None, engine=None,
+                layout=False):
+    """
+    Perform OCR with preprocessing, confidence scoring, and heuristic accuracy estimation.
+    crop_box: (x1, y1, x2, y2) format
+    timeout: seconds before Tesseract recognition is aborted (0 = no limit)
+    """
+    result = perform_ocr_detailed(image_path, psm=psm, lang=lang, crop_box=crop_box, timeout=timeout,
+                                  use_cache=use_cache, pipeline=pipeline, engine=engine, layout=layout)
+    return result["text"], result["accuracy"]
+
+
+OCRResult = namedtuple("OCRResult", ["key", "text", "accuracy", "words", "lines", "blocks", "timings",
+                                     "error", "elapsed", "cached"])
+
+
+def _ocr_job(key, image_path, crop_box, options):
+    """Worker entry point: runs the serial perform_ocr path for a single page."""
+    start = time.perf_counter()
+    try:
+        result = perform_ocr_detailed(image_path, crop_box=crop_box, use_cache=False, **options)
+        return OCRResult(key, result["text"], result["accuracy"], result["words"], result["lines"],
+                         result["blocks"], result["timings"], None, time.perf_counter() - start, False)
+    except Exception as e:
+        return OCRResult(key, "", 0, [], [], [], {}, f"{type(e).__name__}: {e}", time.perf_counter() - start, False)
+
+
+def _in_process_sources(sources):
+    """
+    (key, source) pairs for OCR in this process, with each multi-page file's pages decoded
+    by one front-to-back iter_pages pass instead of reopening the file per page. If that
+    pass fails, the file's remaining pages are passed on as refs so each reports its own error.
+    """
+    pages_by_file = {}
+    for key, source in sources.items():
+        path, index = split_page_ref(source) if isinstance(source, str) else (source, None)
+        if index is None:
+            yield key, source
+        else:
+            pages_by_file.setdefault(path, {})[source] = key
+    for path, keys in pages_by_file.items():
+        try:
+            for ref, image in iter_pages(path):
+                if ref in keys:
+                    yield keys.pop(ref), image
+                if not keys:
+                    break
+        except Exception:
+            pass
+        yield from ((key, ref) for ref, key in keys.items())
+
+
+def _run_ocr_jobs(sources, crop_boxes, options, max_workers):
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(sources)))
+    if max_workers == 1:
+        for key, source in _in_process_sources(sources):
+            yield _ocr_job(key, source, crop_boxes.get(key), options)
+        return
+
+    pending_items = iter(sources.items())
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        # Keep at most 2x workers in flight so large batches don't queue every page up front
+        in_flight = set()
+
+        def submit_next():
+            item = next(pending_items, None)
+            if item is None:
+                return False
+            key, path = item
+            in_flight.add(pool.submit(_ocr_job, key, path, crop_boxes.get(key), options))
+            return True
+
+        while len(in_flight) < 2 * max_workers and submit_next():
+            pass
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                submit_next()
+
+
+def perform_ocr_batch(sources, psm=3, lang="eng", max_workers=None, timeout=0, crop_boxes=None, use_cache=True,
+                      pipeline=None, engine=None, layout=False):
+    """
+    Run perform_ocr over many pages in a bounded process pool.
+    sources: {key: image_path} (or an iterable of paths, used as their own keys)
+    crop_boxes: optional {key: (x1, y1, x2, y2)}
+    timeout: per-page limit in seconds, enforced by the OCR engine (process kill or recognition abort)
+    Cached pages are yielded first without touching the pool; the rest are
+    OCR'd and written back to the cache.
+    Yields OCRResult tuples as pages finish (completion order, not input order).
+    """
+    if not isinstance(sources, dict):
+        sources = {path: path for path in sources}
+    crop_boxes = crop_boxes or {}
+    options = {"psm": psm, "lang": lang, "timeout": timeout, "pipeline": pipeline or DEFAULT_PIPELINE,
+               "engine": engine, "layout": layout}
+    cache = get_ocr_cache() if use_cache else None
+    keys, pending = {}, {}
+    for key, path in sources.items():
+        if cache is None:
+            pending[key] = path
+            continue
+        start = time.perf_counter()
+        keys[key] = ocr_cache_key(path, psm=psm, lang=lang, crop_box=crop_boxes.get(key),
+                                  pipeline=options["pipeline"], engine=engine, layout=layout)
+        cached = cache.get(keys[key])
+        if cached is None:
+            pending[key] = path
+        else:
+            yield OCRResult(key, cached["text"], cached["accuracy"], cached["words"], cached["lines"],
+                            cached.get("blocks", []), cached.get("timings", {}), None, time.perf_counter() - start, True)
+
+    if not pending:
+        return
+    if layout:
+        # Split the cores between page-level processes and block-level threads so neither oversubscribes
+        page_workers = max(1, min(max_workers or os.cpu_count() or 1, len(pending)))
+        options["layout_workers"] = max(1, (max_workers or os.cpu_count() or 1) // page_workers)
+    for result in _run_ocr_jobs(pending, crop_boxes, options, max_workers):
+        if cache is not None and result.error is None:
+            cache.put(keys[result.key], {"text": result.text, "accuracy": result.accuracy,
+                                         "words": result.words, "lines": result.lines,
+                                         "blocks": result.blocks, "timings": result.timings})
+        yield result
 
 
 def simulate_damaged_text(text, mask_ratio=0.1):
@@ -0,0 +1,118 @@
+import time
+
+import cv2
+import numpy as np
+
+# Noise sigma (on a 0-255 scale) above which the "auto" denoise mode kicks in
+NOISE_THRESHOLD = 4.0
+
+
+def estimate_noise(gray):
+    """
+    Fast noise sigma estimate (Immerkaer, 1996): a single 3x3 Laplacian-difference
+    convolution, so it costs a fraction of any denoising pass.
+    """
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    height, width = gray.shape[:2]
+    if height < 3 or width < 3:
+        return 0.0
+    response = cv2.filter2D(gray.astype(np.float32), -1, kernel)
+    sigma = np.abs(response[1:-1, 1:-1]).sum()
+    return float(sigma * np.sqrt(0.5 * np.pi) / (6 * (width - 2) * (height - 2)))
+
+
+# --- Stages: each takes (image, context) and returns the new image ---
+
+def to_grayscale(image, context):
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def normalize_dpi(image, context, target_dpi=300, max_pixels=12_000_000):
+    """Downscale scans above target_dpi (or above max_pixels when the DPI is unknown)."""
+    height, width = image.shape[:2]
+    dpi = context.get("dpi")
+    scale = 1.0
+    if dpi and dpi > target_dpi:
+        scale = target_dpi / dpi
+    elif not dpi and width * height > max_pixels:
+        scale = (max_pixels / (width * height)) ** 0.5
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    context["scale"] = context.get("scale", 1.0) * scale
+    return image
+
+
+def denoise(image, context, method="auto", threshold=NOISE_THRESHOLD):
+    """
+    method: "auto" (median only when the noise estimate exceeds threshold),
+    "median", "bilateral", "nlmeans" (the original fastNlMeansDenoising h=10) or "none".
+    """
+    if method == "auto":
+        context["noise"] = round(estimate_noise(image), 2)
+        method = "median" if context["noise"] > threshold else "none"
+    context["denoise"] = method
+    if method == "median":
+        return cv2.medianBlur(image, 3)
+    if method == "bilateral":
+        return cv2.bilateralFilter(image, 5, 50, 50)
+    if method == "nlmeans":
+        return cv2.fastNlMeansDenoising(image, h=10)
+    return image
+
+
+def threshold(image, context, method="otsu", block_size=31, offset=10):
+    """Binarize with global Otsu or local adaptive (Gaussian) thresholding."""
+    if method == "adaptive":
+        return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY, block_size, offset)
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+class PreprocessPipeline:
+    """
+    Ordered list of (name, stage, kwargs) steps applied to a BGR or grayscale image.
+    run() returns the processed image plus a context dict holding per-stage
+    timings (ms), the downscale factor applied and any stage diagnostics.
+    """
+
+    def __init__(self, stages):
+        self.stages = [(name, fn, dict(kwargs)) for name, fn, kwargs in stages]
+
+    @property
+    def signature(self):
+        """Stable description of the configuration, used in OCR cache keys."""
+        return [[name, sorted(kwargs.items())] for name, _, kwargs in self.stages]
+
+    def run(self, image, dpi=None):
+        context = {"dpi": dpi, "scale": 1.0, "timings": {}}
+        for name, fn, kwargs in self.stages:
+            start = time.perf_counter()
+            image = fn(image, context, **kwargs)
+            context["timings"][name] = round((time.perf_counter() - start) * 1000, 2)
+        return image, context
+
+
+def build_pipeline(target_dpi=300, denoise_method="auto", threshold_method="otsu"):
+    """Default OCR preprocessing: grayscale -> DPI normalization -> noise-gated denoise -> binarize."""
+    return PreprocessPipeline([
+        ("grayscale", to_grayscale, {}),
+        ("normalize_dpi", normalize_dpi, {"target_dpi": target_dpi}),
+        ("denoise", denoise, {"method": denoise_method}),
+        ("threshold", threshold, {"method": threshold_method}),
+    ])
+
+
+def legacy_pipeline():
+    """The original full-resolution fastNlMeansDenoising + Otsu path, kept for benchmarking."""
+    return PreprocessPipeline([
+        ("grayscale", to_grayscale, {}),
+        ("denoise", denoise, {"method": "nlmeans"}),
+        ("threshold", threshold, {"method": "otsu"}),
+    ])
+
+
+DEFAULT_PIPELINE = build_pipeline()
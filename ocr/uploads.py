@@ -0,0 +1,77 @@
+import hashlib
+import os
+import threading
+
+from PIL import Image
+
+from ocr.ingest import iter_page_refs, open_page
+
+UPLOAD_DIR = os.getenv("ECOSCRIBE_UPLOAD_DIR", "uploads")
+THUMBNAIL_SIZE = 480  # longest side in pixels; what the UI shows instead of the full scan
+THUMBNAIL_DPI = 50  # enough to render a PDF page for a 480px preview
+CROP_PREVIEW_SIZE = 1000  # the crop editor works on this instead of the full-resolution scan
+
+
+def _tmp_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def save_upload(fileobj, name, upload_dir=UPLOAD_DIR, chunk_size=1024 * 1024):
+    """
+    Store an uploaded file content-addressed as <upload_dir>/<sha256><ext> and return
+    that path. Identical content is written only once (whatever it was called, whoever
+    uploaded it), via a temp file and an atomic rename so readers never see a partial file.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    path = os.path.join(upload_dir, digest.hexdigest() + os.path.splitext(name)[1].lower())
+    if not os.path.exists(path):
+        tmp_path = _tmp_path(path)
+        fileobj.seek(0)
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    return path
+
+
+def thumbnail_path(path, size=THUMBNAIL_SIZE):
+    """
+    Path of a downscaled JPEG preview of path's first page, generated on first request.
+    Content-addressed uploads never change, so an existing thumbnail is always current.
+    """
+    thumb_dir = os.path.join(os.path.dirname(path) or ".", "thumbnails")
+    thumb = os.path.join(thumb_dir, f"{os.path.splitext(os.path.basename(path))[0]}_{size}.jpg")
+    if os.path.exists(thumb):
+        return thumb
+    os.makedirs(thumb_dir, exist_ok=True)
+    image = open_page(next(iter_page_refs(path)), dpi=THUMBNAIL_DPI * max(1, size // THUMBNAIL_SIZE))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((size, size))
+    tmp_path = _tmp_path(thumb)
+    image.save(tmp_path, format="JPEG", quality=80)
+    os.replace(tmp_path, thumb)
+    return thumb
+
+
+def image_size(path):
+    """(width, height) from the file header, without decoding the pixels."""
+    with Image.open(path) as image:
+        return image.size
+
+
+def preview_box_to_full(box, preview_size, full_size):
+    """
+    Map a {"left", "top", "width", "height"} box drawn on a preview image to an
+    (x1, y1, x2, y2) crop_box in full-resolution pixels, clamped to the image.
+    """
+    scale_x, scale_y = full_size[0] / preview_size[0], full_size[1] / preview_size[1]
+    x1 = min(max(0, round(box["left"] * scale_x)), full_size[0] - 1)
+    y1 = min(max(0, round(box["top"] * scale_y)), full_size[1] - 1)
+    x2 = max(x1 + 1, min(full_size[0], round((box["left"] + box["width"]) * scale_x)))
+    y2 = max(y1 + 1, min(full_size[1], round((box["top"] + box["height"]) * scale_y)))
+    return [x1, y1, x2, y2]
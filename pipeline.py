@@ -0,0 +1,246 @@
+"""
+Headless EcoScribe pipeline: ingest -> OCR -> restore -> analyze -> export.
+
+    python pipeline.py archive/ --out results/
+    python pipeline.py "archive/**/*.pdf" --out results/ --ocr-workers 8 --llm-concurrency 16
+
+Every finished document is appended to <out>/results.jsonl and its restored
+text written to <out>/texts/. Rerunning with the same --out skips documents
+already completed (matched by path and content hash), so a crashed or
+interrupted run resumes where it stopped.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import genai.client
+from genai.analyze_text import analyze_many
+from genai.restore_text import restore_many, restore_text_chunked
+from ocr.ingest import SUPPORTED_EXTENSIONS, file_digest, iter_page_refs, split_page_ref
+from ocr.ocr_utils import perform_ocr_batch
+from ocr.preprocess import build_pipeline
+
+RESULTS_FILE = "results.jsonl"
+CHUNKED_THRESHOLD = 6000  # characters; longer documents are restored section by section
+
+
+def collect_inputs(pattern):
+    """Supported files under a directory (recursively) or matching a glob, in sorted order."""
+    if os.path.isdir(pattern):
+        paths = (os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names)
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(p for p in paths if os.path.splitext(p)[1].lower() in SUPPORTED_EXTENSIONS)
+
+
+def load_completed(results_path):
+    """(source, sha256) of every document already written successfully."""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash; that document is simply redone
+            if record.get("status") == "ok":
+                completed.add((record["source"], record["sha256"]))
+    return completed
+
+
+def export_text(out_dir, doc, text):
+    texts_dir = os.path.join(out_dir, "texts")
+    os.makedirs(texts_dir, exist_ok=True)
+    # The hash prefix keeps same-named files from different folders apart
+    stem = os.path.splitext(os.path.basename(doc["source"]))[0]
+    path = os.path.join(texts_dir, f"restored_{stem}_{doc['sha256'][:8]}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+class Pipeline:
+    def __init__(self, out_dir, style="simple", use_rag=False, analyze=True):
+        self.out_dir = out_dir
+        self.style = style
+        self.use_rag = use_rag
+        self.analyze = analyze
+        self.timings = defaultdict(list)  # stage -> seconds per document
+        self.counts = defaultdict(int)
+        os.makedirs(out_dir, exist_ok=True)
+        self.results = open(os.path.join(out_dir, RESULTS_FILE), "a", encoding="utf-8")
+
+    def _restore(self, texts):
+        short = [i for i, t in enumerate(texts) if len(t) <= CHUNKED_THRESHOLD]
+        restored = [None] * len(texts)
+        for i, result in zip(short, restore_many([texts[i] for i in short], style=self.style, use_rag=self.use_rag)):
+            restored[i] = result
+        for i, text in enumerate(texts):
+            if restored[i] is None:
+                try:
+                    restored[i], _ = restore_text_chunked(text, style=self.style, use_rag=self.use_rag)
+                except Exception as e:
+                    restored[i] = e
+        return restored
+
+    def process_batch(self, docs):
+        """Restore, analyze, export and record a batch of OCR'd documents (runs on the LLM thread)."""
+        start = time.perf_counter()
+        restored = self._restore([doc["ocr_text"] for doc in docs])
+        elapsed = time.perf_counter() - start
+        self.timings["restore"] += [elapsed / len(docs)] * len(docs)
+
+        ok = [i for i, r in enumerate(restored) if not isinstance(r, Exception)]
+        analyses = [None] * len(docs)
+        if self.analyze and ok:
+            start = time.perf_counter()
+            for i, analysis in zip(ok, analyze_many([restored[i] for i in ok])):
+                analyses[i] = analysis
+            elapsed = time.perf_counter() - start
+            self.timings["analyze"] += [elapsed / len(ok)] * len(ok)
+
+        start = time.perf_counter()
+        for doc, text, analysis in zip(docs, restored, analyses):
+            record = {key: doc[key] for key in ("source", "sha256", "pages", "ocr_accuracy", "ocr_text")}
+            if isinstance(text, Exception):
+                record.update(status="error", stage="restore", error=str(text))
+            elif isinstance(analysis, Exception):
+                record.update(status="error", stage="analyze", error=str(analysis), restored_text=text)
+            else:
+                record.update(status="ok", restored_text=text, analysis=analysis,
+                              export=export_text(self.out_dir, doc, text))
+            self.write(record)
+        self.flush()
+        self.timings["export"] += [(time.perf_counter() - start) / len(docs)] * len(docs)
+
+    def write(self, record):
+        self.counts[record["status"]] += 1
+        self.results.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def fail(self, doc, stage, error):
+        self.write({"source": doc["source"], "sha256": doc["sha256"], "status": "error", "stage": stage,
+                    "error": error})
+        self.flush()
+
+    def flush(self):
+        # Durable before the next batch starts, so a crash never loses a finished document
+        self.results.flush()
+        os.fsync(self.results.fileno())
+
+    def close(self):
+        self.results.close()
+
+
+def run(inputs, out_dir, ocr_workers=None, llm_concurrency=None, batch_size=16, psm=3, lang="eng",
+        engine=None, layout=False, style="simple", use_rag=False, analyze=True):
+    """Process inputs end to end; returns the Pipeline (its timings and counts feed the report)."""
+    if llm_concurrency:
+        # Read when each event loop creates its semaphore, so this applies to every batch below
+        genai.client.MAX_CONCURRENCY = llm_concurrency
+
+    pipeline = Pipeline(out_dir, style=style, use_rag=use_rag, analyze=analyze)
+    completed = load_completed(os.path.join(out_dir, RESULTS_FILE))
+
+    # Ingest: expand multi-page files into page refs, skipping finished documents
+    docs, owner = {}, {}
+    start = time.perf_counter()
+    for path in inputs:
+        sha256 = file_digest(path)
+        if (path, sha256) in completed:
+            pipeline.counts["skipped"] += 1
+            continue
+        doc = {"source": path, "sha256": sha256, "results": {}}
+        try:
+            refs = list(iter_page_refs(path))
+        except Exception as e:
+            pipeline.fail(doc, "ingest", str(e))
+            continue
+        if not refs:
+            pipeline.fail(doc, "ingest", "no pages")
+            continue
+        doc["pages"] = len(refs)
+        docs[path] = doc
+        owner.update((ref, path) for ref in refs)
+    pipeline.timings["ingest"].append(time.perf_counter() - start)
+
+    # OCR runs in its process pool while finished batches go through the LLM stages on one thread
+    with ThreadPoolExecutor(max_workers=1) as llm_stage:
+        futures, batch = [], []
+        results = perform_ocr_batch(list(owner), psm=psm, lang=lang, max_workers=ocr_workers,
+                                    pipeline=build_pipeline(), engine=engine, layout=layout)
+        for result in results:
+            doc = docs[owner[result.key]]
+            doc["results"][result.key] = result
+            pipeline.timings["ocr_page"].append(result.elapsed)
+            if len(doc["results"]) < doc["pages"]:
+                continue
+
+            pages = sorted(doc.pop("results").values(), key=lambda r: split_page_ref(r.key)[1] or 0)
+            errors = [r.error for r in pages if r.error]
+            if errors:
+                # Through the LLM thread too, so only one thread ever writes results.jsonl
+                futures.append(llm_stage.submit(pipeline.fail, doc, "ocr", errors[0]))
+                continue
+            doc["ocr_text"] = "\n\n".join(r.text for r in pages)
+            doc["ocr_accuracy"] = round(sum(r.accuracy for r in pages) / len(pages), 2)
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                futures.append(llm_stage.submit(pipeline.process_batch, batch))
+                batch = []
+        if batch:
+            futures.append(llm_stage.submit(pipeline.process_batch, batch))
+        for future in futures:
+            future.result()
+    pipeline.close()
+    return pipeline
+
+
+def print_report(pipeline, elapsed):
+    documents = pipeline.counts["ok"] + pipeline.counts["error"]
+    print(f"\n{documents} documents processed in {elapsed:.1f}s "
+          f"({pipeline.counts['ok']} ok, {pipeline.counts['error']} failed, "
+          f"{pipeline.counts['skipped']} already done)")
+    if documents:
+        print(f"Throughput: {documents / elapsed * 60:.1f} documents/min, "
+              f"{len(pipeline.timings['ocr_page']) / elapsed * 60:.1f} pages/min")
+    for stage in ("ingest", "ocr_page", "restore", "analyze", "export"):
+        values = pipeline.timings.get(stage)
+        if values:
+            print(f"  {stage:<9} n={len(values):<6} mean {statistics.mean(values):7.2f}s   "
+                  f"p50 {statistics.median(values):7.2f}s   max {max(values):7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run OCR, restoration and analysis over a folder of scans")
+    parser.add_argument("input", help="directory (searched recursively) or glob pattern")
+    parser.add_argument("--out", default="pipeline_output")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="OCR processes (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=None,
+                        help="concurrent Gemini requests (default: ECOSCRIBE_LLM_CONCURRENCY)")
+    parser.add_argument("--batch-size", type=int, default=16, help="documents per restore/analyze batch")
+    parser.add_argument("--psm", type=int, default=3)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--engine", default=None, choices=["auto", "tesserocr", "pytesseract"])
+    parser.add_argument("--layout", action="store_true", help="layout-aware OCR for multi-column pages")
+    parser.add_argument("--style", default="simple")
+    parser.add_argument("--rag", action="store_true", help="use RAG context for restoration")
+    parser.add_argument("--no-analyze", action="store_true", help="skip the summary/metadata analysis stage")
+    args = parser.parse_args()
+
+    inputs = collect_inputs(args.input)
+    print(f"{len(inputs)} input files")
+    start = time.perf_counter()
+    pipeline = run(inputs, args.out, ocr_workers=args.ocr_workers, llm_concurrency=args.llm_concurrency,
+                   batch_size=args.batch_size, psm=args.psm, lang=args.lang, engine=args.engine,
+                   layout=args.layout, style=args.style, use_rag=args.rag, analyze=not args.no_analyze)
+    print_report(pipeline, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from store.sqlite_base import DEFAULT_STORE_DIR, SQLiteStore, process_singleton
+
+HEARTBEAT_TIMEOUT = 30.0  # seconds without a heartbeat before a worker is presumed dead
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+ACTIVE = (PENDING, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job (from progress()) once cancellation was requested."""
+
+
+def make_dedup_key(kind, payload):
+    return hashlib.sha256(f"{kind}:{json.dumps(payload, sort_keys=True, default=str)}".encode("utf-8")).hexdigest()
+
+
+class JobQueue(SQLiteStore):
+    """
+    Local job queue in SQLite shared by the Streamlit app and worker processes (see worker.py).
+    Jobs are claimed highest priority first and, within a priority, from the owner
+    (session) with the fewest running jobs, so one user's batch can't starve the rest.
+    An identical job (same kind and payload) that is still pending or running is
+    returned instead of being queued twice.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+        "dedup_key TEXT NOT NULL, owner TEXT, priority INTEGER NOT NULL DEFAULT 0, "
+        "status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT, result TEXT, error TEXT, "
+        "cancel_requested INTEGER NOT NULL DEFAULT 0, worker TEXT, "
+        "created REAL NOT NULL, started REAL, finished REAL)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_dedup ON jobs(dedup_key) "
+        "WHERE status IN ('pending', 'running')",
+        "CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(status, priority, created)",
+        "CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, pid INTEGER, seen REAL NOT NULL)",
+    )
+    # Autocommit, so _transaction() can take the write lock itself with BEGIN IMMEDIATE
+    ISOLATION_LEVEL = None
+    ROW_FACTORY = sqlite3.Row
+
+    def __init__(self, path=None):
+        super().__init__(path or os.path.join(DEFAULT_STORE_DIR, "jobs.sqlite"))
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two workers can never claim the same job
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, kind, payload, priority=0, owner=None):
+        """Queue a job and return its id (the existing id if an identical job is already pending/running)."""
+        dedup_key = make_dedup_key(kind, payload)
+        with self._transaction() as conn:
+            row = conn.execute("SELECT id FROM jobs WHERE dedup_key = ? AND status IN ('pending', 'running')",
+                               (dedup_key,)).fetchone()
+            if row:
+                return row["id"]
+            cursor = conn.execute(
+                "INSERT INTO jobs(kind, payload, dedup_key, owner, priority, status, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), dedup_key, owner, priority, PENDING, time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id):
+        """
+        Mark the next job running for worker_id and return it as a dict, or None if the queue is empty.
+        Jobs of workers that stopped heartbeating are requeued first, so a crashed worker's
+        jobs are picked up by the live pool instead of staying "running" forever.
+        """
+        with self._transaction() as conn:
+            self._requeue_orphans(conn)
+            row = conn.execute(
+                "SELECT id FROM jobs AS j WHERE status = 'pending' ORDER BY priority DESC, "
+                "(SELECT COUNT(*) FROM jobs AS r WHERE r.status = 'running' AND r.owner IS j.owner), created "
+                "LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = ?, worker = ?, started = ? WHERE id = ?",
+                         (RUNNING, worker_id, time.time(), row["id"]))
+            job = dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def progress(self, job_id, fraction, message=None):
+        """Record progress; raises JobCancelled if the job was cancelled meanwhile."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE id = ?",
+                         (fraction, message, job_id))
+            cancelled = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        if cancelled:
+            raise JobCancelled(job_id)
+
+    def _close(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, "
+                         "progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END WHERE id = ?",
+                         (status, json.dumps(result), error, time.time(), status, job_id))
+
+    def finish(self, job_id, result=None):
+        self._close(job_id, DONE, result=result)
+
+    def fail(self, job_id, error):
+        self._close(job_id, FAILED, error=error)
+
+    def mark_cancelled(self, job_id):
+        self._close(job_id, CANCELLED)
+
+    def cancel(self, job_id):
+        """Cancel a pending job right away; a running one stops at its next progress() call."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status = 'pending'",
+                         (CANCELLED, time.time(), job_id))
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def jobs(self, owner=None, limit=20, ids=None):
+        """Most recent jobs, optionally only owner's and/or only those in ids."""
+        conditions, args = [], []
+        if owner:
+            conditions.append("owner = ?")
+            args.append(owner)
+        if ids is not None:
+            ids = list(ids)
+            conditions.append(f"id IN ({', '.join('?' * len(ids))})" if ids else "0")
+            args.extend(ids)
+        query = ("SELECT * FROM jobs" + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                 + " ORDER BY id DESC LIMIT ?")
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, (*args, limit))]
+
+    def heartbeat(self, worker_id):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO workers(id, pid, seen) VALUES (?, ?, ?)",
+                         (worker_id, os.getpid(), time.time()))
+
+    def live_workers(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM workers WHERE seen > ?",
+                                (time.time() - HEARTBEAT_TIMEOUT,)).fetchone()[0]
+
+    def _requeue_orphans(self, conn):
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'pending', worker = NULL, started = NULL WHERE status = 'running' "
+            "AND cancel_requested = 0 AND worker NOT IN (SELECT id FROM workers WHERE seen > ?)",
+            (time.time() - HEARTBEAT_TIMEOUT,),
+        )
+        conn.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE status = 'running' "
+                     "AND cancel_requested = 1 AND worker NOT IN (SELECT id FROM workers WHERE seen > ?)",
+                     (time.time(), time.time() - HEARTBEAT_TIMEOUT))
+        return cursor.rowcount
+
+    def requeue_orphans(self):
+        """Put jobs whose worker stopped heartbeating back in the queue; returns how many."""
+        with self._transaction() as conn:
+            return self._requeue_orphans(conn)
+
+
+@process_singleton
+def get_job_queue():
+    """Process-wide JobQueue instance."""
+    return JobQueue()
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import MutableMapping
+
+from store.sqlite_base import DEFAULT_STORE_DIR, SQLiteStore, process_singleton
+
+INLINE_LIMIT = 16 * 1024  # bytes; larger values live in content-addressed blob files
+
+# Bump a stage's version when its prompt/logic changes so stored results are recomputed
+STAGE_VERSIONS = {
+    "extracted_results": 1,
+    "ocr_accuracy": 1,
+    "ocr_words": 1,
+    "restored_text": 1,
+    "summary_texts": 1,
+    "titles": 1,
+    "keywords_map": 1,
+    "classifications": 1,
+}
+
+# Stage -> the stage whose output it is computed from; a result is stale once its input changes
+STAGE_INPUTS = {
+    "restored_text": "extracted_results",
+    "summary_texts": "restored_text",
+    "titles": "restored_text",
+    "keywords_map": "restored_text",
+    "classifications": "restored_text",
+}
+
+
+def _hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResultStore(SQLiteStore):
+    """
+    Durable per-document, per-stage results (OCR text, restorations, summaries, ...)
+    in SQLite, with large values in blob files next to it. Each entry records the
+    hash of its input stage's value, its parameters and the stage version, so
+    callers can tell fresh results from stale ones and only recompute the latter.
+    Shared by every Streamlit session and survives restarts.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS results ("
+        "doc TEXT NOT NULL, stage TEXT NOT NULL, value TEXT, blob TEXT, size INTEGER NOT NULL, "
+        "input_hash TEXT, params TEXT, version INTEGER NOT NULL, updated REAL NOT NULL, "
+        "PRIMARY KEY (doc, stage))",
+        "CREATE INDEX IF NOT EXISTS results_stage ON results(stage)",
+    )
+
+    def __init__(self, path=None):
+        super().__init__(path or os.path.join(DEFAULT_STORE_DIR, "results.sqlite"))
+        self.blob_dir = os.path.splitext(self.path)[0] + "_blobs"
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def _write_blob(self, data):
+        name = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        path = os.path.join(self.blob_dir, name)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return name
+
+    def _read(self, value, blob):
+        if blob is None:
+            return json.loads(value)
+        with open(os.path.join(self.blob_dir, blob), encoding="utf-8") as f:
+            return json.loads(f.read())
+
+    def _input_hash(self, doc, stage):
+        upstream = STAGE_INPUTS.get(stage)
+        if upstream is None:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, blob FROM results WHERE doc = ? AND stage = ?",
+                               (doc, upstream)).fetchone()
+        return _hash(self._read(*row)) if row else None
+
+    def put(self, doc, stage, value, params=None):
+        """Store stage's result for doc, recording the current input-stage value it was computed from."""
+        data = json.dumps(value)
+        inline, blob = (data, None) if len(data) <= INLINE_LIMIT else (None, self._write_blob(data))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results(doc, stage, value, blob, size, input_hash, params, version, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc, stage, inline, blob, len(data), self._input_hash(doc, stage),
+                 _hash(params) if params is not None else None, STAGE_VERSIONS.get(stage, 1), time.time()),
+            )
+
+    def get(self, doc, stage, default=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, blob FROM results WHERE doc = ? AND stage = ?", (doc, stage)).fetchone()
+        return self._read(*row) if row else default
+
+    def has(self, doc, stage):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM results WHERE doc = ? AND stage = ?", (doc, stage)).fetchone() is not None
+
+    def is_fresh(self, doc, stage, params=None):
+        """True if a result exists, matches the stage version and params, and its input stage hasn't changed since."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT input_hash, params, version FROM results WHERE doc = ? AND stage = ?",
+                               (doc, stage)).fetchone()
+        if row is None:
+            return False
+        input_hash, stored_params, version = row
+        if version != STAGE_VERSIONS.get(stage, 1):
+            return False
+        if params is not None and stored_params != _hash(params):
+            return False
+        return input_hash == self._input_hash(doc, stage)
+
+    def statuses(self, docs, stages):
+        """
+        {(doc, stage): fresh} for every stored result of docs in stages, read in one query
+        (the same version and input checks as is_fresh, but without params).
+        """
+        docs, stages = list(docs), set(stages)
+        if not docs or not stages:
+            return {}
+        wanted = stages | {STAGE_INPUTS[stage] for stage in stages if stage in STAGE_INPUTS}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT doc, stage, value, blob, input_hash, version FROM results "
+                f"WHERE doc IN ({', '.join('?' * len(docs))}) AND stage IN ({', '.join('?' * len(wanted))})",
+                (*docs, *wanted),
+            ).fetchall()
+        found = {(doc, stage): row for doc, stage, *row in rows}
+        statuses = {}
+        for (doc, stage), (_, _, input_hash, version) in found.items():
+            if stage not in stages:
+                continue
+            upstream = found.get((doc, STAGE_INPUTS[stage])) if stage in STAGE_INPUTS else None
+            current_input = _hash(self._read(*upstream[:2])) if upstream else None
+            statuses[doc, stage] = version == STAGE_VERSIONS.get(stage, 1) and input_hash == current_input
+        return statuses
+
+    def delete(self, doc, stage):
+        # Blob files are content-addressed and may be shared, so they are left for prune_blobs()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE doc = ? AND stage = ?", (doc, stage))
+
+    def docs(self, stage, among=None):
+        """Docs with a stored stage result; with among, only those of among, in among's order."""
+        if among is None:
+            with self._connect() as conn:
+                return [row[0] for row in conn.execute("SELECT doc FROM results WHERE stage = ? ORDER BY doc", (stage,))]
+        among = list(among)
+        if not among:
+            return []
+        with self._connect() as conn:
+            stored = {row[0] for row in conn.execute(
+                f"SELECT doc FROM results WHERE stage = ? AND doc IN ({', '.join('?' * len(among))})", (stage, *among))}
+        return [doc for doc in among if doc in stored]
+
+    def count(self, stage, among=None):
+        if among is not None:
+            return len(self.docs(stage, among))
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM results WHERE stage = ?", (stage,)).fetchone()[0]
+
+    def prune_blobs(self):
+        """Remove blob files no entry refers to any more."""
+        with self._connect() as conn:
+            referenced = {row[0] for row in conn.execute("SELECT blob FROM results WHERE blob IS NOT NULL")}
+        for name in os.listdir(self.blob_dir):
+            if name not in referenced and not name.endswith(".tmp"):
+                os.remove(os.path.join(self.blob_dir, name))
+
+
+class StageView(MutableMapping):
+    """
+    dict-like view of one stage ({doc: value}) that reads and writes through to the store.
+    Drop-in for the st.session_state result dicts: values are loaded on access,
+    so a session never holds every document's full text in memory.
+    With scope (a callable returning doc keys, e.g. one session's uploads) the view
+    only lists and reads those documents, although the store is shared by everyone.
+    """
+
+    def __init__(self, store, stage, scope=None):
+        self.store = store
+        self.stage = stage
+        self.scope = scope
+
+    def _in_scope(self, doc):
+        return self.scope is None or doc in self.scope()
+
+    def __getitem__(self, doc):
+        if not self._in_scope(doc):
+            raise KeyError(doc)
+        missing = object()
+        value = self.store.get(doc, self.stage, missing)
+        if value is missing:
+            raise KeyError(doc)
+        return value
+
+    def __setitem__(self, doc, value):
+        self.store.put(doc, self.stage, value)
+
+    def put(self, doc, value, params=None):
+        """Like view[doc] = value, also recording the parameters the value was computed with."""
+        self.store.put(doc, self.stage, value, params)
+
+    def __delitem__(self, doc):
+        if doc not in self:
+            raise KeyError(doc)
+        self.store.delete(doc, self.stage)
+
+    def __contains__(self, doc):
+        return self._in_scope(doc) and self.store.has(doc, self.stage)
+
+    def __iter__(self):
+        return iter(self.store.docs(self.stage, None if self.scope is None else self.scope()))
+
+    def __len__(self):
+        return self.store.count(self.stage, None if self.scope is None else self.scope())
+
+    def is_fresh(self, doc, params=None):
+        return self.store.is_fresh(doc, self.stage, params)
+
+    def __repr__(self):
+        return f"StageView({self.stage!r}, {len(self)} documents)"
+
+
+@process_singleton
+def get_result_store():
+    """Process-wide ResultStore instance."""
+    return ResultStore()
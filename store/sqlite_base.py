@@ -0,0 +1,81 @@
+import functools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_STORE_DIR = os.getenv("ECOSCRIBE_CACHE_DIR", ".cache")
+
+COUNTERS_TABLE = "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+
+
+class SQLiteStore:
+    """
+    Base for the SQLite files under .cache (OCR/LLM caches, result store, job queue).
+    WAL mode plus a short-lived connection per call make them safe to share
+    between Streamlit sessions and worker processes. Subclasses list their
+    CREATE statements in SCHEMA; each _connect() block is one transaction.
+    """
+
+    SCHEMA = ()
+    ISOLATION_LEVEL = ""  # sqlite3's default (implicit transactions); None for autocommit
+    ROW_FACTORY = None
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=self.ISOLATION_LEVEL)
+        if self.ROW_FACTORY is not None:
+            conn.row_factory = self.ROW_FACTORY
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def add_counter(conn, name, amount=1):
+    """Add amount to a lifetime counter in the counters table (see COUNTERS_TABLE)."""
+    conn.execute(
+        "INSERT INTO counters(name, value) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount),
+    )
+
+
+def read_counters(conn):
+    return dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+
+def evict_lru(conn, table, max_bytes):
+    """Delete table's least recently used rows (by last_access) until its size column sums to max_bytes or less."""
+    total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+    if total <= max_bytes:
+        return
+    for key, size in conn.execute(f"SELECT key, size FROM {table} ORDER BY last_access").fetchall():
+        conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+def process_singleton(factory):
+    """Decorator: the wrapped getter creates its instance on first call and returns that one from then on."""
+    lock = threading.Lock()
+    instances = []
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            if not instances:
+                instances.append(factory())
+            return instances[0]
+
+    return get
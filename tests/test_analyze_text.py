@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import genai.analyze_text as analyze_text
+import genai.client as client
+from genai.analyze_text import _parse_analysis, validate_analysis
+from genai.llm_cache import LLMCache
+
+VALID = {
+    "summary": "A grant of land.",
+    "title": "Charter of the Abbey",
+    "author": "The King",
+    "date": "1215",
+    "keywords": ["abbey", " land ", ""],
+    "domain": "historical",
+    "category": "LEGAL",
+    "reason": "A grant of rights.",
+}
+
+
+def test_valid_analysis_is_normalized():
+    analysis = validate_analysis({**VALID, "extra": "dropped"})
+
+    assert analysis["keywords"] == ["abbey", "land"]
+    assert analysis["domain"] == "Historical"
+    assert analysis["category"] == "Legal"
+    assert "extra" not in analysis
+
+
+def test_comma_separated_keywords_and_unknown_category():
+    analysis = validate_analysis({**VALID, "keywords": "abbey, land,, grant", "category": "Poetry"})
+
+    assert analysis["keywords"] == ["abbey", "land", "grant"]
+    assert analysis["category"] == "General"
+
+
+@pytest.mark.parametrize("data, message", [
+    ([VALID], "not a JSON object"),
+    ({k: v for k, v in VALID.items() if k != "title"}, "missing fields: title"),
+    ({**VALID, "summary": ["a", "b"]}, "'summary' should be str"),
+    ({**VALID, "keywords": 3}, "'keywords' should be list"),
+])
+def test_unusable_analysis_is_rejected(data, message):
+    with pytest.raises(ValueError, match=message):
+        validate_analysis(data)
+
+
+def test_parse_accepts_fenced_json():
+    fenced = "```json\n" + json.dumps(VALID) + "\n```"
+
+    assert _parse_analysis(fenced)["title"] == "Charter of the Abbey"
+
+
+def test_parse_rejects_invalid_json():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        _parse_analysis('{"summary": "cut off')
+
+
+class FakeResponse:
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    model_name = "models/fake"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+
+    def generate_content(self, prompt, generation_config=None, request_options=None):
+        return FakeResponse(self.replies.pop(0))
+
+
+def test_invalid_reply_is_not_cached(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    model = FakeModel(["not json", json.dumps(VALID)])
+    monkeypatch.setattr(client, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(analyze_text, "get_model", lambda: model)
+    monkeypatch.setattr(client, "_retryable_errors", lambda: (TimeoutError,))
+    monkeypatch.setattr(client, "rate_limiter", client.TokenBucket(60_000, burst=1000))
+
+    with pytest.raises(ValueError):
+        analyze_text.analyze_document("document")
+    assert cache.stats()["entries"] == 0
+
+    assert analyze_text.analyze_document("document")["category"] == "Legal"
+    assert cache.stats()["entries"] == 1
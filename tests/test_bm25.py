@@ -0,0 +1,74 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from genai.bm25 import BM25Index, tokenize
+
+CHUNKS = [
+    ("c0", "The abbot granted the mill to the priory."),
+    ("c1", "Witnesses swore the boundary stone stood by the mill race, the mill race."),
+    ("c2", "A charter of the king confirming the abbot's lands."),
+    ("c3", "Nothing relevant here at all."),
+]
+
+
+def _reference_scores(items, query, k1=1.5, b=0.75):
+    counts = {key: Counter(tokenize(text)) for key, text in items}
+    avg_len = sum(sum(c.values()) for c in counts.values()) / len(counts)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(term in c for c in counts.values())
+        if not df:
+            continue
+        idf = math.log1p((len(counts) - df + 0.5) / (df + 0.5))
+        for key, c in counts.items():
+            if term in c:
+                norm = k1 * (1 - b + b * sum(c.values()) / avg_len)
+                scores[key] = scores.get(key, 0.0) + idf * c[term] * (k1 + 1) / (c[term] + norm)
+    return scores
+
+
+def test_build_writes_csr_postings():
+    index = BM25Index.build(CHUNKS)
+    counts = [Counter(tokenize(text)) for _, text in CHUNKS]
+
+    assert list(index.terms) == sorted(set().union(*counts))
+    assert index.offsets[-1] == len(index.doc_ids) == len(index.tfs)
+    for t, term in enumerate(index.terms):
+        start, end = index.offsets[t], index.offsets[t + 1]
+        postings = dict(zip(index.doc_ids[start:end].tolist(), index.tfs[start:end].tolist()))
+        assert postings == {doc: c[term] for doc, c in enumerate(counts) if term in c}
+        assert list(index.doc_ids[start:end]) == sorted(index.doc_ids[start:end])
+
+
+def test_search_matches_reference_bm25():
+    index = BM25Index.build(CHUNKS)
+    expected = _reference_scores(CHUNKS, "mill race abbot")
+
+    results = index.search("mill race abbot", k=10)
+
+    assert [key for key, _ in results] == sorted(expected, key=expected.get, reverse=True)
+    for key, score in results:
+        assert score == pytest.approx(expected[key], rel=1e-5)
+
+
+def test_search_limits_to_k_and_ignores_unknown_terms():
+    index = BM25Index.build(CHUNKS)
+
+    assert len(index.search("the mill abbot", k=2)) == 2
+    assert index.search("zzz qqq") == []
+    assert index.search("") == []
+    assert BM25Index.build([]).search("mill") == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(CHUNKS)
+    index.save(str(tmp_path))
+
+    loaded = BM25Index.load(str(tmp_path))
+
+    assert isinstance(loaded.doc_ids, np.memmap)
+    assert loaded.search("boundary stone") == index.search("boundary stone")
+    assert BM25Index.load(str(tmp_path / "missing")) is None
@@ -0,0 +1,64 @@
+import re
+
+from genai.chunking import split_text, split_text_with_overlaps, stitch_chunks
+
+
+def _words(text):
+    return text.split()
+
+
+def test_split_text_matches_split_text_with_overlaps():
+    text = "\n\n".join(f"Paragraph {i} has a few words in it." for i in range(50))
+    chunks, overlaps = split_text_with_overlaps(text, max_chars=200, overlap_chars=60)
+    assert split_text(text, max_chars=200, overlap_chars=60) == chunks
+    assert overlaps[0] == ""
+    for chunk, overlap in zip(chunks[1:], overlaps[1:]):
+        assert chunk.startswith(overlap)
+
+
+def test_stitch_restores_repeated_paragraphs():
+    paragraph = "The tide came in over the sand and the gulls rose again."
+    text = "\n\n".join([paragraph] * 40)
+    assert len(_words(text)) == 480
+    chunks, overlaps = split_text_with_overlaps(text, max_chars=400, overlap_chars=150)
+    assert len(chunks) > 5
+
+    stitched = stitch_chunks(chunks, overlaps)
+
+    assert _words(stitched) == _words(text)
+
+
+SENTENCE = re.compile(r"S(\d+):")
+
+
+def _legal_text(count):
+    sentences = []
+    for i in range(1, count + 1):
+        if i % 3 == 0:
+            sentences.append(f"S{i}: The tenement in ward {i} is granted unto the said Abbot and his successors for ever.")
+        else:
+            sentences.append(f"S{i}: Witness number {i} swore that the boundary stone stood by the mill race.")
+    return " ".join(sentences)
+
+
+def _reword_overlap(chunk, overlap):
+    # Light restoration edits inside the repeated overlap, as a model rephrasing its context would make
+    head = chunk[:len(overlap)]
+    for old, new in (("swore that", "declared that"), ("is granted", "was granted"), ("stone", "marker")):
+        head = head.replace(old, new)
+    return head + chunk[len(overlap):]
+
+
+def test_stitch_never_drops_sentences_around_recurring_formula():
+    text = _legal_text(40)
+    chunks, overlaps = split_text_with_overlaps(text, max_chars=500, overlap_chars=200)
+    restored = [chunks[0]] + [_reword_overlap(chunk, overlap) for chunk, overlap in zip(chunks[1:], overlaps[1:])]
+
+    stitched = stitch_chunks(restored, overlaps)
+
+    numbers = [int(n) for n in SENTENCE.findall(stitched)]
+    assert list(dict.fromkeys(numbers)) == list(range(1, 41))
+
+
+def test_stitch_concatenates_without_overlap():
+    assert stitch_chunks(["First part.", "Second part."], ["", ""]) == "First part.\n\nSecond part."
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import genai.client as client
+from genai.llm_cache import LLMCache
+
+
+class FakeResponse:
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for GenerativeModel: fails the first `failures` calls, records every call."""
+
+    model_name = "models/fake"
+
+    def __init__(self, failures=0, slow_calls=0, stream_chunks=None):
+        self.failures = failures
+        self.slow_calls = slow_calls
+        self.stream_chunks = stream_chunks
+        self.calls = []
+        self.loops = []
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        self.calls.append(request_options)
+        if len(self.calls) <= self.failures:
+            raise TimeoutError("quota")
+        if stream:
+            return iter(self.stream_chunks or [])
+        return FakeResponse(f"reply to {prompt}")
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.loops.append(asyncio.get_running_loop())
+        self.calls.append(None)
+        if len(self.calls) <= self.slow_calls:
+            await asyncio.sleep(5)
+        return FakeResponse(f"reply to {prompt}")
+
+
+@pytest.fixture(autouse=True)
+def no_waiting(monkeypatch):
+    # google.api_core isn't needed to exercise the retry loop; TimeoutError is one of its retryable errors
+    monkeypatch.setattr(client, "_retryable_errors", lambda: (TimeoutError,))
+    monkeypatch.setattr(client, "_backoff", lambda attempt: 0)
+    monkeypatch.setattr(client, "rate_limiter", client.TokenBucket(60_000, burst=1000))
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    bucket = client.TokenBucket(60, burst=2)
+
+    waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(1.0, abs=0.05)
+    assert waits[3] == pytest.approx(2.0, abs=0.05)
+
+
+def test_generate_text_retries_transient_errors_with_deadline():
+    model = FakeModel(failures=2)
+
+    text = client.generate_text(model, "hello", use_cache=False, deadline=7)
+
+    assert text == "reply to hello"
+    assert model.calls == [{"timeout": 7}] * 3
+
+
+def test_generate_text_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(client, "MAX_RETRIES", 2)
+    model = FakeModel(failures=10)
+
+    with pytest.raises(TimeoutError):
+        client.generate_text(model, "hello", use_cache=False)
+    assert len(model.calls) == 3
+
+
+def test_async_deadline_is_retried():
+    model = FakeModel(slow_calls=1)
+
+    results = client.generate_many(model, ["a"], use_cache=False, deadline=0.05)
+
+    assert results == ["reply to a"]
+    assert len(model.calls) == 2
+
+
+def test_batches_share_one_event_loop():
+    model = FakeModel()
+
+    client.generate_many(model, ["a", "b"], use_cache=False)
+    client.generate_many(model, ["c"], use_cache=False)
+
+    assert len(set(model.loops)) == 1
+    assert not model.loops[0].is_closed()
+
+
+def test_empty_stream_is_not_cached(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(client, "get_llm_cache", lambda: cache)
+    model = FakeModel(stream_chunks=[])
+
+    assert list(client.generate_stream(model, "hello")) == []
+    assert cache.get(client.make_llm_key(model.model_name, "hello", None)) is None
+
+    model.stream_chunks = [FakeResponse("hi"), FakeResponse(" there")]
+    assert "".join(client.generate_stream(model, "hello")) == "hi there"
+    assert cache.get(client.make_llm_key(model.model_name, "hello", None)) == "hi there"
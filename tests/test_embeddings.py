@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from genai.embeddings import HashingEmbeddings, load_provider, resolve_provider, save_provider  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXTS = [
+    "The abbot granted the mill to the priory.",
+    "The abbot  granted the MILL to the priory!",
+    "Quarterly revenue figures for the software division.",
+]
+
+
+def test_vectors_are_unit_length_with_configured_dim():
+    vectors = np.array(HashingEmbeddings(dim=256).embed_documents(TEXTS))
+
+    assert vectors.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_batch_matches_single_queries():
+    embeddings = HashingEmbeddings()
+
+    batch = embeddings.embed_documents(TEXTS)
+
+    for text, vector in zip(TEXTS, batch):
+        assert np.allclose(embeddings.embed_query(text), vector)
+
+
+def test_similar_texts_score_higher_than_unrelated():
+    a, b, c = np.array(HashingEmbeddings().embed_documents(TEXTS))
+
+    assert a @ b > 0.8
+    assert a @ b > a @ c + 0.3
+
+
+def test_empty_inputs():
+    embeddings = HashingEmbeddings(dim=64)
+
+    assert embeddings.embed_documents([]) == []
+    assert embeddings.embed_query("") == [0.0] * 64
+
+
+def test_deterministic_across_processes():
+    code = ("from genai.embeddings import HashingEmbeddings; "
+            f"print(HashingEmbeddings().embed_query({TEXTS[0]!r})[:8])")
+    other = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                           env={**os.environ, "PYTHONHASHSEED": "123"}, cwd=ROOT)
+
+    assert other.stdout.strip() == str(HashingEmbeddings().embed_query(TEXTS[0])[:8])
+
+
+def test_provider_resolution_and_record(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert resolve_provider("auto") == "local"
+    monkeypatch.setenv("OPENAI_API_KEY", "x")
+    assert resolve_provider("auto") == "openai"
+    with pytest.raises(ValueError):
+        resolve_provider("word2vec")
+
+    assert load_provider(str(tmp_path)) == "openai"  # indexes built before the record existed
+    save_provider(str(tmp_path), "local")
+    assert load_provider(str(tmp_path)) == "local"
@@ -0,0 +1,97 @@
+import pytest
+
+from store.job_queue import CANCELLED, DONE, HEARTBEAT_TIMEOUT, PENDING, RUNNING, JobCancelled, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def _claim(queue, worker_id):
+    # Workers heartbeat before claiming (see worker.work_loop); claim() requeues jobs of silent ones
+    queue.heartbeat(worker_id)
+    return queue.claim(worker_id)
+
+
+def _age_heartbeat(queue, worker_id, seconds):
+    with queue._connect() as conn:
+        conn.execute("UPDATE workers SET seen = seen - ? WHERE id = ?", (seconds, worker_id))
+
+
+def test_identical_active_job_is_deduplicated(queue):
+    first = queue.enqueue("ocr", {"paths": ["a"]}, owner="alice")
+    assert queue.enqueue("ocr", {"paths": ["a"]}, owner="bob") == first
+    assert queue.enqueue("ocr", {"paths": ["b"]}, owner="bob") != first
+
+    queue.finish(_claim(queue, "w1")["id"])
+
+    assert queue.enqueue("ocr", {"paths": ["a"]}, owner="bob") != first
+
+
+def test_claim_prefers_priority_then_least_busy_owner(queue):
+    queue.enqueue("ocr", {"n": 1}, owner="alice")
+    queue.enqueue("ocr", {"n": 2}, owner="alice")
+    bob = queue.enqueue("ocr", {"n": 3}, owner="bob")
+    urgent = queue.enqueue("ocr", {"n": 4}, owner="alice", priority=5)
+
+    assert _claim(queue, "w1")["id"] == urgent
+    # alice already has a job running, so bob's goes next although it was queued later
+    assert _claim(queue, "w2")["id"] == bob
+    assert _claim(queue, "w3")["payload"] == {"n": 1}
+
+
+def test_claim_on_empty_queue_returns_none(queue):
+    assert queue.claim("w1") is None
+
+
+def test_claim_requeues_jobs_of_a_dead_worker(queue):
+    job_id = queue.enqueue("ocr", {"n": 1})
+    assert _claim(queue, "dead")["id"] == job_id
+    _age_heartbeat(queue, "dead", HEARTBEAT_TIMEOUT + 1)
+
+    job = _claim(queue, "alive")
+
+    assert job["id"] == job_id
+    assert job["worker"] == "alive"
+
+
+def test_running_job_of_live_worker_is_left_alone(queue):
+    queue.enqueue("ocr", {"n": 1})
+    _claim(queue, "w1")
+
+    assert queue.requeue_orphans() == 0
+    assert _claim(queue, "w2") is None
+
+
+def test_cancel(queue):
+    pending = queue.enqueue("ocr", {"n": 1})
+    queue.cancel(pending)
+    assert queue.get(pending)["status"] == CANCELLED
+
+    running = queue.enqueue("ocr", {"n": 2})
+    _claim(queue, "w1")
+    queue.cancel(running)
+    assert queue.get(running)["status"] == RUNNING
+    with pytest.raises(JobCancelled):
+        queue.progress(running, 0.5)
+
+
+def test_jobs_filters_by_owner_and_ids(queue):
+    mine = queue.enqueue("ocr", {"n": 1}, owner="alice")
+    shared = queue.enqueue("ocr", {"n": 2}, owner="bob")
+
+    assert [job["id"] for job in queue.jobs(owner="alice")] == [mine]
+    assert [job["id"] for job in queue.jobs(ids=[mine, shared])] == [shared, mine]
+    assert queue.jobs(ids=[]) == []
+    assert {job["status"] for job in queue.jobs()} == {PENDING}
+
+
+def test_finish_records_result(queue):
+    job_id = queue.enqueue("ocr", {"n": 1})
+    _claim(queue, "w1")
+    queue.finish(job_id, {"documents": 1})
+
+    job = queue.get(job_id)
+    assert job["status"] == DONE
+    assert job["progress"] == 1
@@ -0,0 +1,49 @@
+import itertools
+import json
+
+import ocr.ocr_cache as ocr_cache
+from ocr.ocr_cache import OCRCache, make_cache_key
+
+PAGE = b"\x89PNG page bytes"
+
+
+def test_cache_key_is_stable_and_ignores_param_order():
+    assert make_cache_key(PAGE, psm=3, lang="eng") == make_cache_key(PAGE, lang="eng", psm=3)
+
+
+def test_cache_key_changes_with_content_or_params():
+    key = make_cache_key(PAGE, psm=3, lang="eng", crop_box=None)
+
+    assert make_cache_key(PAGE + b"!", psm=3, lang="eng", crop_box=None) != key
+    assert make_cache_key(PAGE, psm=6, lang="eng", crop_box=None) != key
+    assert make_cache_key(PAGE, psm=3, lang="deu", crop_box=None) != key
+    assert make_cache_key(PAGE, psm=3, lang="eng", crop_box=[0, 0, 10, 10]) != key
+
+
+def test_put_get_and_counters(tmp_path):
+    cache = OCRCache(str(tmp_path / "ocr.sqlite"))
+    key = make_cache_key(PAGE, psm=3)
+
+    assert cache.get(key) is None
+    cache.put(key, {"text": "hello", "confidence": 91.5})
+
+    assert cache.get(key) == {"text": "hello", "confidence": 91.5}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert OCRCache(str(tmp_path / "ocr.sqlite")).stats()["total_hits"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = itertools.count(1)
+    monkeypatch.setattr(ocr_cache.time, "time", lambda: float(next(clock)))
+    value = {"text": "x" * 100}
+    cache = OCRCache(str(tmp_path / "ocr.sqlite"), max_bytes=2 * len(json.dumps(value)))
+    cache.put("old", value)
+    cache.put("recent", value)
+    cache.get("old")
+
+    cache.put("new", value)
+
+    assert cache.get("recent") is None
+    assert cache.get("old") == value
+    assert cache.get("new") == value
@@ -0,0 +1,67 @@
+from genai.prompting import TASK_BUDGETS, compact_text, estimate_tokens, fit_document, normalize_text
+
+MARATHI_SENTENCES = [
+    "मराठी ही महाराष्ट्राची राजभाषा आहे.",
+    "या दस्तऐवजात गावातील जमिनीच्या नोंदी आहेत.",
+    "जुन्या कागदपत्रांमध्ये अनेक शब्द अस्पष्ट झाले आहेत.",
+    "साक्षीदारांनी सीमेच्या दगडाबद्दल साक्ष दिली.",
+]
+
+
+def _marathi_document(size):
+    lines, i = [], 0
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"{MARATHI_SENTENCES[i % len(MARATHI_SENTENCES)]} नोंद {i}.")
+        i += 1
+    return "\n".join(lines)
+
+
+def test_fit_document_keeps_devanagari_text():
+    text = _marathi_document(35_000)
+    assert estimate_tokens(text) > TASK_BUDGETS["classify"]
+
+    fitted = fit_document(text, "classify")
+
+    assert fitted.strip()
+    assert "मराठी" in fitted or "दस्तऐवजात" in fitted
+    assert estimate_tokens(fitted) <= TASK_BUDGETS["classify"] + 1
+
+
+def test_compact_text_never_empties_non_empty_input():
+    junk = "\n".join(["~~ |# @@ ,, ;; ^^"] * 2000)
+
+    compacted = compact_text(junk, 100)
+
+    assert compacted.strip()
+    assert junk.startswith(compacted)
+
+
+def test_fit_document_leaves_short_text_untouched():
+    text = "The abbot granted the mill to the priory."
+
+    assert fit_document(text, "classify") is text
+
+
+def test_fit_document_centres_on_focus():
+    text = "filler sentence about nothing. " * 2000 + "The boundary stone stood by the mill race. " + \
+        "more filler text here. " * 2000
+
+    fitted = fit_document(text, "explain", focus="Boundary stone")
+
+    assert "boundary stone" in fitted
+    assert len(fitted) == TASK_BUDGETS["explain"] * 4
+
+
+def test_normalize_then_junk_lines_are_dropped_first():
+    line = "The witnesses swore the boundary stone stood by the mill race."
+    noisy = "\n".join([f"{line}   \n~~ |# @@ ,, ;;\n-------------"] * 110)
+    assert estimate_tokens(noisy) > 2000
+
+    compacted = compact_text(noisy, 2000)
+
+    # Every sentence survives: removing the noise alone brought the text under budget
+    assert compacted == "\n".join([line] * 110)
+
+
+def test_normalize_text_joins_hyphenated_breaks_and_collapses_rulers():
+    assert normalize_text("bound-\nary  stone\n\n\n\n........\nend") == "boundary stone\n\n.\nend"
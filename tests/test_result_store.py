@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import store.result_store as result_store
+from store.result_store import INLINE_LIMIT, ResultStore, StageView
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite"))
+
+
+def test_result_is_stale_once_its_input_changes(store):
+    store.put("doc", "extracted_results", "ocr text")
+    store.put("doc", "restored_text", "restored")
+    assert store.is_fresh("doc", "restored_text")
+
+    store.put("doc", "extracted_results", "re-OCR'd text")
+
+    assert not store.is_fresh("doc", "restored_text")
+    assert store.is_fresh("doc", "extracted_results")
+
+
+def test_params_must_match_when_given(store):
+    store.put("doc", "extracted_results", "text", params={"psm": 3, "lang": "eng"})
+
+    assert store.is_fresh("doc", "extracted_results", {"lang": "eng", "psm": 3})
+    assert not store.is_fresh("doc", "extracted_results", {"psm": 6, "lang": "eng"})
+    assert store.is_fresh("doc", "extracted_results")  # no params: only input and version are checked
+
+
+def test_result_without_params_is_stale_for_any_params(store):
+    store.put("doc", "extracted_results", "text")
+
+    assert not store.is_fresh("doc", "extracted_results", {"psm": 3})
+
+
+def test_stage_version_bump_makes_results_stale(store, monkeypatch):
+    store.put("doc", "summary_texts", "summary")
+    assert store.is_fresh("doc", "summary_texts")
+
+    monkeypatch.setitem(result_store.STAGE_VERSIONS, "summary_texts", 2)
+
+    assert not store.is_fresh("doc", "summary_texts")
+
+
+def test_missing_result_is_not_fresh(store):
+    assert not store.is_fresh("doc", "restored_text")
+
+
+def test_large_values_round_trip_through_blobs(store):
+    value = "x" * (INLINE_LIMIT + 1)
+    store.put("doc", "restored_text", value)
+
+    assert store.get("doc", "restored_text") == value
+    store.delete("doc", "restored_text")
+    store.prune_blobs()
+    assert os.listdir(store.blob_dir) == []
+
+
+def test_statuses_matches_is_fresh_in_one_query(store):
+    store.put("a", "extracted_results", "A")
+    store.put("a", "restored_text", "A restored")
+    store.put("b", "extracted_results", "B")
+    store.put("b", "restored_text", "B restored")
+    store.put("b", "extracted_results", "B again")
+
+    statuses = store.statuses(["a", "b", "c"], ["extracted_results", "restored_text", "summary_texts"])
+
+    assert statuses == {
+        ("a", "extracted_results"): True,
+        ("a", "restored_text"): True,
+        ("b", "extracted_results"): True,
+        ("b", "restored_text"): False,
+    }
+    assert all(store.is_fresh(doc, stage) == fresh for (doc, stage), fresh in statuses.items())
+
+
+def test_scoped_view_only_sees_its_documents(store):
+    store.put("mine", "restored_text", "my text")
+    store.put("theirs", "restored_text", "their text")
+    uploads = ["mine", "not-yet-processed"]
+    view = StageView(store, "restored_text", scope=lambda: uploads)
+
+    assert list(view) == ["mine"]
+    assert len(view) == 1
+    assert "theirs" not in view
+    with pytest.raises(KeyError):
+        view["theirs"]
+    assert dict(view.items()) == {"mine": "my text"}
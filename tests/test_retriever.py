@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community.vectorstores")
+
+from genai.retriever import _mmr, _rrf  # noqa: E402
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    vector, bm25 = ["a", "b", "c"], ["c", "a", "d"]
+
+    fused = _rrf([vector, bm25])
+
+    assert fused["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert sorted(fused, key=fused.get, reverse=True) == ["a", "c", "b", "d"]
+
+
+def test_rrf_of_nothing_is_empty():
+    assert _rrf([]) == {}
+    assert _rrf([[], []]) == {}
+
+
+def test_mmr_skips_near_duplicates():
+    relevance = np.array([1.0, 0.95, 0.5])
+    # 0 and 1 are the same passage; 2 is different
+    similarity = np.array([[1.0, 0.99, 0.1],
+                           [0.99, 1.0, 0.1],
+                           [0.1, 0.1, 1.0]])
+
+    assert _mmr(relevance, similarity, [10, 10, 10], budget=20, lambda_mult=0.6) == [0, 2]
+
+
+def test_mmr_with_lambda_one_ranks_by_relevance():
+    relevance = np.array([0.2, 1.0, 0.6])
+    similarity = np.eye(3)
+
+    assert _mmr(relevance, similarity, [1, 1, 1], budget=10, lambda_mult=1.0) == [1, 2, 0]
+
+
+def test_mmr_respects_token_budget():
+    relevance = np.array([1.0, 0.9, 0.8])
+    similarity = np.eye(3)
+
+    # The second-best candidate doesn't fit once the best is picked; a cheaper one still does
+    assert _mmr(relevance, similarity, [60, 50, 30], budget=100, lambda_mult=0.6) == [0, 2]
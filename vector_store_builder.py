@@ -1,20 +1,241 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import OpenAIEmbeddings
 
+from genai.bm25 import BM25Index
+from genai.embeddings import get_embeddings, load_provider, resolve_provider, save_provider
+
+import argparse
+import hashlib
+import itertools
+import json
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+VECTOR_DB_PATH = "rag_vector_db"
+MANIFEST_FILE = "manifest.json"
+BATCH_SIZE = 64
+CHECKPOINT_EVERY = 20  # batches
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(db_path=VECTOR_DB_PATH):
+    """
+    {filename: {"sha256", "chunk_ids", "complete"}} for the files in the index, or None if there is none.
+    "complete" is False for a file whose chunks were only partly embedded when the last checkpoint was written.
+    """
+    try:
+        with open(os.path.join(db_path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(db_path, files):
+    tmp_path = os.path.join(db_path, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f)
+    os.replace(tmp_path, os.path.join(db_path, MANIFEST_FILE))
+
+
+def build_bm25(vectorstore):
+    """BM25 index over every chunk in the store, keyed by docstore id."""
+    return BM25Index.build((doc_id, vectorstore.docstore.search(doc_id).page_content)
+                           for doc_id in vectorstore.index_to_docstore_id.values())
+
+
+def _save(vectorstore, db_path, provider, manifest, bm25=True):
+    # Provider first, so a retriever hot-reloading the new index never pairs it with stale metadata
+    os.makedirs(db_path, exist_ok=True)
+    save_provider(db_path, provider)
+    if bm25:
+        # Rebuilt from the docstore (cheap next to embedding); checkpoints skip it, and the
+        # retriever ignores BM25 hits for chunks its FAISS index doesn't have
+        build_bm25(vectorstore).save(db_path)
+    vectorstore.save_local(db_path)
+    save_manifest(db_path, manifest)
+
+
+def _chunk_prefix(filename, sha256):
+    """ID prefix for a file's chunks, from its name and content, so identical copies of a file never share IDs."""
+    return hashlib.sha256(f"{filename}\0{sha256}".encode("utf-8")).hexdigest()[:16]
+
+
+def _iter_chunks(folder_path, pending, splitter, embedded_ids):
+    """
+    Stream (filename, sha256, chunk_id, doc, is_last) one file at a time.
+    doc is None for chunks already in the index (resuming an interrupted file)
+    and for the single placeholder emitted by a file that splits into nothing.
+    """
+    for filename, sha256 in pending:
+        docs = splitter.split_documents(TextLoader(os.path.join(folder_path, filename)).load())
+        if not docs:
+            yield filename, sha256, None, None, True
+        prefix = _chunk_prefix(filename, sha256)
+        for i, doc in enumerate(docs):
+            # Derived IDs, so re-indexing an unchanged file always yields the same chunks
+            chunk_id = f"{prefix}-{i}"
+            yield filename, sha256, chunk_id, None if chunk_id in embedded_ids else doc, i == len(docs) - 1
+
+
+def _batched(items, size):
+    items = iter(items)
+    while batch := list(itertools.islice(items, size)):
+        yield batch
 
-def build_vectorstore_from_folder(folder_path="knowledge"):
-    docs = []
-    for filename in os.listdir(folder_path):
+
+def _embed_batch(embeddings, batch):
+    texts = [doc.page_content for _, _, _, doc, _ in batch if doc is not None]
+    return embeddings.embed_documents(texts) if texts else []
+
+
+def _embed_batches(embeddings, batches, workers):
+    """Yield (batch, vectors) in order; with workers > 1 up to 2 * workers batches are embedded ahead."""
+    if workers <= 1:
+        for batch in batches:
+            yield batch, _embed_batch(embeddings, batch)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append((batch, pool.submit(_embed_batch, embeddings, batch)))
+            if len(in_flight) >= 2 * workers:
+                batch, future = in_flight.popleft()
+                yield batch, future.result()
+        while in_flight:
+            batch, future = in_flight.popleft()
+            yield batch, future.result()
+
+
+def build_vectorstore_from_folder(folder_path="knowledge", provider=None, full=False, db_path=VECTOR_DB_PATH,
+                                  batch_size=BATCH_SIZE, workers=1, checkpoint_every=CHECKPOINT_EVERY,
+                                  progress=None):
+    """
+    Index every .txt file under folder_path into db_path.
+    Only new or changed files (by content hash) are split and embedded; chunks of
+    changed or deleted files are removed from the index. full=True rebuilds from scratch.
+
+    Files are streamed through the splitter into fixed-size embedding batches
+    (optionally embedded on `workers` threads), so memory stays bounded by the
+    batches in flight. The index and manifest are checkpointed every
+    checkpoint_every batches; rerunning after a failure resumes from there.
+    progress (optional) is called with the report dict after every batch.
+    Returns a report dict with file and chunk counts.
+    """
+    # "openai" uses your OpenAI key; "local" embeds offline on the CPU (see ECOSCRIBE_EMBEDDINGS)
+    provider = resolve_provider(provider)
+    embeddings = get_embeddings(provider)
+    manifest = None if full else load_manifest(db_path)
+    if manifest is not None and load_provider(db_path) != provider:
+        # Vectors from another provider can't share an index with ours
+        manifest = None
+
+    vectorstore = None
+    rebuild = manifest is None
+    if not rebuild:
+        vectorstore = FAISS.load_local(db_path, embeddings, allow_dangerous_deserialization=True)
+    manifest = manifest or {}
+
+    current = {}
+    for filename in sorted(os.listdir(folder_path)):
         if filename.endswith(".txt"):
-            loader = TextLoader(os.path.join(folder_path, filename))
-            docs.extend(loader.load())
+            current[filename] = _file_hash(os.path.join(folder_path, filename))
+
+    report = {"files_added": 0, "files_changed": 0, "files_removed": 0,
+              "chunks_embedded": 0, "chunks_skipped": 0, "chunks_removed": 0, "elapsed": 0.0}
 
+    indexed = {filename for filename, entry in manifest.items() if entry.get("complete", True)}
+    embedded_ids = set()
+    stale_ids = []
+    for filename, entry in list(manifest.items()):
+        if current.get(filename) == entry["sha256"]:
+            if entry.get("complete", True):
+                report["chunks_skipped"] += len(entry["chunk_ids"])
+            else:
+                embedded_ids.update(entry["chunk_ids"])
+            continue
+        stale_ids.extend(entry["chunk_ids"])
+        if filename in indexed:
+            report["files_changed" if filename in current else "files_removed"] += 1
+        del manifest[filename]
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+        report["chunks_removed"] = len(stale_ids)
+
+    pending = [(f, sha256) for f, sha256 in current.items()
+               if f not in manifest or not manifest[f].get("complete", True)]
     splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
-    split_docs = splitter.split_documents(docs)
+    batches = _batched(_iter_chunks(folder_path, pending, splitter, embedded_ids), batch_size)
+
+    start = time.perf_counter()
+    for done, (batch, vectors) in enumerate(_embed_batches(embeddings, batches, workers), start=1):
+        chunks = [(chunk_id, doc) for _, _, chunk_id, doc, _ in batch if doc is not None]
+        if chunks:
+            text_embeddings = [(doc.page_content, vector) for (_, doc), vector in zip(chunks, vectors)]
+            metadatas = [doc.metadata for _, doc in chunks]
+            ids = [chunk_id for chunk_id, _ in chunks]
+            if vectorstore is None:
+                vectorstore = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+            else:
+                vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+        for filename, sha256, chunk_id, doc, is_last in batch:
+            entry = manifest.setdefault(filename, {"sha256": sha256, "chunk_ids": [], "complete": False})
+            if doc is not None:
+                entry["chunk_ids"].append(chunk_id)
+            elif chunk_id is not None:
+                report["chunks_skipped"] += 1
+            if is_last:
+                entry["complete"] = True
+                if filename not in indexed:
+                    report["files_added"] += 1
+        report["chunks_embedded"] += len(chunks)
+        report["elapsed"] = time.perf_counter() - start
+
+        if vectorstore is not None and checkpoint_every and done % checkpoint_every == 0:
+            _save(vectorstore, db_path, provider, manifest, bm25=False)
+        if progress is not None:
+            progress(report)
+
+    if vectorstore is not None and (rebuild or report["chunks_embedded"] or report["chunks_removed"]):
+        _save(vectorstore, db_path, provider, manifest)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the RAG vector store. "
+                                                 "Rerun without --full to resume an interrupted build.")
+    parser.add_argument("--folder", default="knowledge")
+    parser.add_argument("--provider", default=None, help="openai, local or auto (default: ECOSCRIBE_EMBEDDINGS)")
+    parser.add_argument("--full", action="store_true", help="rebuild the index from scratch")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="chunks per embedding request")
+    parser.add_argument("--workers", type=int, default=1, help="batches embedded in parallel")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="save the index every N batches (0 = only at the end)")
+    args = parser.parse_args()
+
+    def show_progress(report):
+        rate = report["chunks_embedded"] / report["elapsed"] if report["elapsed"] else 0.0
+        print(f"\r{report['chunks_embedded']} chunks embedded, {report['chunks_skipped']} skipped "
+              f"({rate:,.1f} chunks/s)", end="", flush=True)
 
-    embeddings = OpenAIEmbeddings()  # uses your OpenAI key
-    vectorstore = FAISS.from_documents(split_docs, embeddings)
-    vectorstore.save_local("rag_vector_db")
+    report = build_vectorstore_from_folder(args.folder, provider=args.provider, full=args.full,
+                                           batch_size=args.batch_size, workers=args.workers,
+                                           checkpoint_every=args.checkpoint_every, progress=show_progress)
+    print()
+    print(f"Files: {report['files_added']} added, {report['files_changed']} changed, "
+          f"{report['files_removed']} removed")
+    print(f"Chunks: {report['chunks_embedded']} embedded, {report['chunks_skipped']} skipped, "
+          f"{report['chunks_removed']} removed")
+    if report["elapsed"]:
+        print(f"Throughput: {report['chunks_embedded'] / report['elapsed']:,.1f} chunks/s "
+              f"over {report['elapsed']:.1f}s")
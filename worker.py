@@ -0,0 +1,244 @@
+"""
+Background workers for the EcoScribe job queue (store/job_queue.py).
+
+    python worker.py --workers 4
+
+Each worker process claims jobs from the shared queue and writes their results
+to the durable result store, where every Streamlit session picks them up.
+app.py starts a pool automatically (ECOSCRIBE_WORKERS) when none is running.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from functools import partial
+
+from store.job_queue import HEARTBEAT_TIMEOUT, JobCancelled, get_job_queue
+from store.result_store import get_result_store
+
+DEFAULT_WORKERS = int(os.getenv("ECOSCRIBE_WORKERS", "2"))
+LLM_SLICE = 8  # documents per concurrent LLM call group; progress/cancellation is checked between groups
+# OCR options that change the extracted text (max_workers and timeout only change how fast it arrives)
+OCR_PARAM_KEYS = ("psm", "lang", "target_dpi", "denoise", "threshold", "engine", "layout")
+
+
+def ocr_params(options, crop_box=None):
+    """Params an extracted_results entry is stored with, so other OCR settings or crops read as stale."""
+    return {**{key: options[key] for key in OCR_PARAM_KEYS}, "crop_box": list(crop_box) if crop_box else None}
+
+
+def restore_params(style="simple", use_rag=False):
+    """Params a restored_text entry is stored with."""
+    return {"style": style, "use_rag": use_rag}
+
+
+def ocr_thread_share(workers=DEFAULT_WORKERS):
+    """Cores one worker's OCR job may use, so concurrent jobs on different workers don't oversubscribe the box."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def run_ocr(payload, report, max_threads=None):
+    from ocr.ingest import split_page_ref
+    from ocr.ocr_utils import perform_ocr_batch
+    from ocr.preprocess import build_pipeline
+
+    sources, owners, options = payload["sources"], payload["owners"], payload["options"]
+    # Crop boxes (x1, y1, x2, y2) in full-resolution pixels, applied to the original when it is decoded
+    crop_boxes = {key: tuple(box) for key, box in payload.get("crop_boxes", {}).items()}
+    pipeline = build_pipeline(target_dpi=options["target_dpi"], denoise_method=options["denoise"],
+                              threshold_method=options["threshold"])
+    max_workers = min(options["max_workers"], max_threads or ocr_thread_share())
+    results = perform_ocr_batch(sources, psm=options["psm"], lang=options["lang"],
+                                max_workers=max_workers, timeout=options["timeout"], crop_boxes=crop_boxes,
+                                pipeline=pipeline, engine=options["engine"], layout=options["layout"])
+    pages, page_errors = {}, {}
+    for done, result in enumerate(results, start=1):
+        if result.error:
+            page_errors[result.key] = result.error
+        else:
+            pages[result.key] = result
+        source_label = "cache" if result.cached else f"{result.elapsed:.1f}s"
+        report(done / len(sources), f"{os.path.basename(result.key)} finished ({source_label}, {done}/{len(sources)})")
+
+    # Reassemble pages into one document per uploaded file, in page order; a document
+    # with any failed page fails as a whole rather than being stored with pages missing
+    store, failures = get_result_store(), {}
+    for original_path in dict.fromkeys(owners.values()):
+        keys = [k for k in sources if owners[k] == original_path]
+        errors = [f"{os.path.basename(k)}: {page_errors[k]}" for k in keys if k in page_errors]
+        if errors:
+            failures[original_path] = f"{len(errors)} of {len(keys)} page(s) failed; " + "; ".join(errors)
+            continue
+        doc_pages = sorted((pages[k] for k in keys), key=lambda r: split_page_ref(r.key)[1] or 0)
+        store.put(original_path, "extracted_results", "\n\n".join(r.text for r in doc_pages),
+                  params=ocr_params(options, crop_boxes.get(original_path)))
+        store.put(original_path, "ocr_accuracy", round(sum(r.accuracy for r in doc_pages) / len(doc_pages), 2))
+        store.put(original_path, "ocr_words", [w for r in doc_pages for w in r.words])
+    return {"documents": len(set(owners.values())), "failures": failures}
+
+
+def _in_slices(paths, report, work):
+    """Run work(slice) over paths LLM_SLICE at a time, reporting progress (and honouring cancel) in between."""
+    errors = {}
+    for start in range(0, len(paths), LLM_SLICE):
+        report(start / len(paths), f"{start}/{len(paths)} documents")
+        errors.update(work(paths[start:start + LLM_SLICE]))
+    return {"documents": len(paths), "failures": errors}
+
+
+def run_restore(payload, report):
+    from genai.restore_text import restore_many
+    from ocr.ocr_utils import simulate_damaged_text
+
+    store = get_result_store()
+    params = restore_params(use_rag=payload.get("use_rag", False))
+
+    def work(paths):
+        damaged = [simulate_damaged_text(store.get(p, "extracted_results", "")) for p in paths]
+        errors = {}
+        for path, result in zip(paths, restore_many(damaged, use_rag=payload.get("use_rag", False))):
+            if isinstance(result, Exception):
+                errors[path] = str(result)
+            else:
+                store.put(path, "restored_text", result, params=params)
+        return errors
+
+    return _in_slices(payload["paths"], report, work)
+
+
+def run_summarize(payload, report):
+    from genai.summarize_text import summarize_many
+
+    store = get_result_store()
+
+    def work(paths):
+        errors = {}
+        for path, summary in zip(paths, summarize_many([store.get(p, "restored_text", "") for p in paths])):
+            if isinstance(summary, Exception):
+                errors[path] = str(summary)
+            else:
+                store.put(path, "summary_texts", summary)
+        return errors
+
+    return _in_slices(payload["paths"], report, work)
+
+
+def run_extract(payload, report):
+    from genai.title_keyword import extract_many
+
+    store = get_result_store()
+
+    def work(paths):
+        errors = {}
+        for path, result in zip(paths, extract_many([store.get(p, "restored_text", "") for p in paths])):
+            if isinstance(result, Exception):
+                errors[path] = str(result)
+                continue
+            title, keywords = result
+            store.put(path, "titles", title)
+            store.put(path, "keywords_map", keywords)
+        return errors
+
+    return _in_slices(payload["paths"], report, work)
+
+
+def run_classify(payload, report):
+    from genai.classify_text import classify_many
+
+    store = get_result_store()
+
+    def work(paths):
+        errors = {}
+        for path, result in zip(paths, classify_many([store.get(p, "restored_text", "") for p in paths])):
+            if isinstance(result, Exception):
+                errors[path] = str(result)
+            else:
+                store.put(path, "classifications", result)
+        return errors
+
+    return _in_slices(payload["paths"], report, work)
+
+
+def run_analyze(payload, report):
+    from genai.analyze_text import analyze_many, format_classification, format_summary
+
+    store = get_result_store()
+
+    def work(paths):
+        errors = {}
+        for path, analysis in zip(paths, analyze_many([store.get(p, "restored_text", "") for p in paths])):
+            if isinstance(analysis, Exception):
+                errors[path] = str(analysis)
+                continue
+            store.put(path, "summary_texts", format_summary(analysis))
+            store.put(path, "titles", analysis["title"])
+            store.put(path, "keywords_map", analysis["keywords"])
+            store.put(path, "classifications", format_classification(analysis))
+        return errors
+
+    return _in_slices(payload["paths"], report, work)
+
+
+HANDLERS = {
+    "ocr": run_ocr,
+    "restore": run_restore,
+    "summarize": run_summarize,
+    "extract": run_extract,
+    "classify": run_classify,
+    "analyze": run_analyze,
+}
+
+
+def _heartbeat(queue, worker_id, stop):
+    while not stop.wait(HEARTBEAT_TIMEOUT / 3):
+        queue.heartbeat(worker_id)
+
+
+def work_loop(poll_interval=1.0, workers=DEFAULT_WORKERS):
+    """Claim and run jobs until the process is stopped; OCR gets this process's share of the cores."""
+    handlers = {**HANDLERS, "ocr": partial(run_ocr, max_threads=ocr_thread_share(workers))}
+    queue = get_job_queue()
+    worker_id = f"worker-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    queue.heartbeat(worker_id)
+    # Beat from a thread so a long OCR batch doesn't look like a dead worker
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, worker_id, stop), daemon=True).start()
+    try:
+        while True:
+            job = queue.claim(worker_id)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            try:
+                queue.finish(job["id"], handlers[job["kind"]](job["payload"], partial(queue.progress, job["id"])))
+            except JobCancelled:
+                queue.mark_cancelled(job["id"])
+            except Exception:
+                queue.fail(job["id"], traceback.format_exc(limit=3))
+    finally:
+        stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run EcoScribe background workers")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    requeued = get_job_queue().requeue_orphans()
+    if requeued:
+        print(f"Requeued {requeued} job(s) left running by a stopped worker")
+    processes = [multiprocessing.Process(target=work_loop, args=(args.poll_interval, args.workers))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    print(f"{len(processes)} worker(s) running; Ctrl+C to stop")
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()